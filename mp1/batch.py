@@ -0,0 +1,144 @@
+from utils import parse_file, visited_to_path, print_sol, print_sol_multiple
+from maze_search import dfs, bfs, greedy, astar_single, bidirectional_bfs, bidirectional_astar, jps, weighted_astar, dynamic_astar, focal_astar, ida_star, sma_star, astar_multiple, astar_mst
+from grid import Grid
+from distance_cache import load_distances
+from tour import tsp_tour
+from corridor import corridor_bfs, corridor_astar
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+# Kept free of the graphics modules, so worker processes never try to open a window
+SINGLE_SEARCHES = {f.__name__: f for f in [dfs, bfs, greedy, astar_single, bidirectional_bfs, bidirectional_astar, jps, weighted_astar, dynamic_astar, focal_astar, ida_star, sma_star, corridor_bfs, corridor_astar]}
+MULTIPLE_SEARCHES = {f.__name__: f for f in [astar_multiple, astar_mst, tsp_tour]}
+SUMMARY_FIELDS = ['maze', 'algorithm', 'found', 'cost', 'nodes_expanded', 'seconds', 'output']
+
+_parsed = {} # per-worker cache, so a worker parses each maze at most once
+
+def find_mazes(pattern):
+	"""Expands a directory or a glob into a sorted list of maze files.
+
+	Arguments:
+		pattern {string} -- a directory (every .txt file in it is used) or a glob like 'mp1.1/inputs/*.txt'
+
+	Returns:
+		list of strings -- maze file paths
+	"""
+	if os.path.isdir(pattern):
+		pattern = os.path.join(pattern, '*.txt')
+	return sorted(glob.glob(pattern))
+
+def available_cores():
+	"""
+	Returns the number of cores this process is allowed to run on
+	"""
+	if hasattr(os, 'sched_getaffinity'):
+		return len(os.sched_getaffinity(0))
+	return os.cpu_count() or 1
+
+def load_maze(path):
+	"""
+	parse_file with a per-process cache
+	"""
+	parsed = _parsed.get(path)
+	if parsed is None:
+		parsed = parse_file(path)
+		_parsed[path] = parsed
+	return parsed
+
+def run_job(job):
+	"""Solves one (maze, algorithm) pair and writes its solution file. Runs inside a worker process.
+
+	Arguments:
+		job {tuple} -- (maze file path, algorithm name, output directory)
+
+	Returns:
+		dict -- one row of the summary (see SUMMARY_FIELDS)
+	"""
+	path, name, output_dir = job
+	maze, states, pacman, dots = load_maze(path)
+	file_name = os.path.splitext(os.path.basename(path))[0]
+	output_path = os.path.join(output_dir, file_name + '_sol_' + name + '.txt')
+
+	row = {'maze': file_name, 'algorithm': name, 'found': False, 'cost': None, 'nodes_expanded': None, 'seconds': None, 'output': None}
+	if not dots: # nothing to search for, the row is kept so the summary still lists the maze
+		return row
+
+	with contextlib.redirect_stdout(io.StringIO()): # the searches print as they go
+		start_time = time.perf_counter()
+		if name in SINGLE_SEARCHES:
+			visited, num_expanded = SINGLE_SEARCHES[name](states, pacman, dots[0])
+			seconds = time.perf_counter() - start_time
+			if dots[0] not in visited:
+				return dict(row, nodes_expanded = num_expanded, seconds = round(seconds, 6))
+			sol = visited_to_path(visited, dots[0])
+			found = True
+			cost = len(sol)
+			print_sol(output_path, maze, sol, num_expanded)
+		else:
+			sol, order, num_expanded = MULTIPLE_SEARCHES[name](states, pacman, dots, load_distances(Grid(maze), dots))
+			seconds = time.perf_counter() - start_time
+			found = set(dots) <= set(sol)
+			cost = len(sol) - 1 if found else None # sol includes the start node
+			print_sol_multiple(output_path, maze, sol, order, num_expanded)
+
+	return dict(row, found = found, cost = cost, nodes_expanded = num_expanded, seconds = round(seconds, 6), output = output_path)
+
+def run_batch(pattern, algorithms, output_dir, workers = None):
+	"""Runs every algorithm on every maze across a process pool and writes summary.csv and summary.json.
+
+	Arguments:
+		pattern {string} -- a directory or a glob of maze files
+		algorithms {list of strings} -- names from SINGLE_SEARCHES or MULTIPLE_SEARCHES
+		output_dir {string} -- where the solution files and the summaries go
+		workers {int} -- pool size, defaults to the number of available cores
+
+	Returns:
+		list of dicts -- the summary rows, in (maze, algorithm) order
+	"""
+	for name in algorithms:
+		if name not in SINGLE_SEARCHES and name not in MULTIPLE_SEARCHES:
+			raise ValueError("Unknown algorithm {0}".format(name))
+	mazes = find_mazes(pattern)
+	jobs = [(path, name, output_dir) for path in mazes for name in algorithms] # maze-major, so a worker's chunk mostly shares one maze
+	os.makedirs(output_dir, exist_ok = True)
+	if not jobs:
+		return []
+
+	workers = min(workers or available_cores(), len(jobs))
+	chunksize = max(1, len(jobs) // (workers * 4))
+	with ProcessPoolExecutor(max_workers = workers) as pool:
+		rows = list(pool.map(run_job, jobs, chunksize = chunksize))
+
+	with open(os.path.join(output_dir, 'summary.csv'), mode='w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames = SUMMARY_FIELDS)
+		writer.writeheader()
+		writer.writerows(rows)
+	with open(os.path.join(output_dir, 'summary.json'), mode='w') as f:
+		json.dump(rows, f, indent = 2)
+	return rows
+
+def print_usage():
+	print("To use:\npython batch.py <maze directory or glob> <output directory> [algorithm,algorithm,...]")
+	print("Algorithms: " + ", ".join(list(SINGLE_SEARCHES) + list(MULTIPLE_SEARCHES)))
+
+def main(args):
+	if len(args) < 2:
+		print_usage()
+		return
+	algorithms = args[2].split(',') if len(args) > 2 else list(SINGLE_SEARCHES)
+	rows = run_batch(args[0], algorithms, args[1])
+	for row in rows:
+		if row['found']:
+			print("{maze} {algorithm}: cost {cost}, {nodes_expanded} expanded, {seconds}s".format(**row))
+		else:
+			print("{maze} {algorithm}: {0}".format("unreachable" if row['seconds'] is not None else "no dots, skipped", **row))
+
+if __name__ == "__main__":
+	main(sys.argv[1:])
@@ -0,0 +1,223 @@
+from utils import parse_lines, visited_to_path
+from grid import Grid
+from maze_gen import GENERATORS
+from maze_search import dfs_grid, bfs_grid, greedy_grid, astar_single_grid, astar_multiple_grid, bfs, astar_single, weighted_astar, dynamic_astar, focal_astar
+from batch import SINGLE_SEARCHES, MULTIPLE_SEARCHES
+from ec import astar_ec
+from corridor import corridor_multiple
+from pathfinder import pathfinder_multiple
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+"""
+Benchmark suite for the maze searches
+Every maze in SUITE is generated from a fixed seed, so runs are reproducible and comparable across commits
+"""
+
+# name, generator, height, width, number of dots, seed
+SUITE = [
+	('backtracker_101', 'backtracker', 101, 101, 1, 1),
+	('backtracker_501', 'backtracker', 501, 501, 1, 2),
+	('rooms_200', 'open_rooms', 200, 200, 1, 3),
+	('obstacles_300', 'random_obstacles', 300, 300, 1, 4),
+	('backtracker_dots', 'backtracker', 31, 31, 12, 5),
+	('rooms_dots', 'open_rooms', 40, 40, 14, 6),
+	('obstacles_dots', 'random_obstacles', 60, 60, 40, 7),
+]
+MST_DOT_LIMIT = 16 # astar_mst is exponential in the number of dots, skip it past this
+TIME_TOLERANCE = 0.5 # fraction slower than the baseline before a run counts as a regression
+MEMORY_TOLERANCE = 0.10
+MIN_SECONDS = 0.01 # timings under this are too noisy to flag
+REPEATS = 5 # the best of this many runs is reported as the wall time
+BOUNDS = [1.0, 1.25, 1.5, 2.0, 3.0] # suboptimality bounds covered by bound_report
+BOUNDED_SEARCHES = [weighted_astar, dynamic_astar, focal_astar]
+
+def grid_search(search):
+	"""
+	Wraps one of the single-goal grid searches so it takes the same arguments and returns the same path as the tuple searches
+	"""
+	def run(maze, states, pacman, dots, grid):
+		parents, num_expanded = search(grid, grid.to_id(pacman), grid.to_id(dots[0]))
+		return len(grid.parents_to_path(parents, grid.to_id(dots[0]))), num_expanded
+	run.__name__ = search.__name__
+	return run
+
+def packed_search(search):
+	"""
+	Wraps one of the grid searches with packed parents, named like "bfs_grid_packed"
+	"""
+	def run(maze, states, pacman, dots, grid):
+		parents, num_expanded = search(grid, grid.to_id(pacman), grid.to_id(dots[0]), packed = True)
+		return len(grid.parents_to_path(parents, grid.to_id(dots[0]))), num_expanded
+	run.__name__ = search.__name__ + '_packed'
+	return run
+
+def single_search(search):
+	def run(maze, states, pacman, dots, grid):
+		visited, num_expanded = search(states, pacman, dots[0])
+		return len(visited_to_path(visited, dots[0])), num_expanded
+	run.__name__ = search.__name__
+	return run
+
+def multiple_search(search):
+	def run(maze, states, pacman, dots, grid):
+		path, order, num_expanded = search(states, pacman, dots)
+		return len(path) - 1, num_expanded
+	run.__name__ = search.__name__
+	return run
+
+def bounded_search(search, bound):
+	"""
+	Wraps one of the bounded-suboptimal searches with its bound fixed, named like "weighted_astar@1.5"
+	"""
+	def run(maze, states, pacman, dots, grid):
+		visited, num_expanded = search(states, pacman, dots[0], bound)
+		return len(visited_to_path(visited, dots[0])), num_expanded
+	run.__name__ = "{0}@{1}".format(search.__name__, bound)
+	return run
+
+def astar_ec_search(maze, states, pacman, dots, grid):
+	num_expanded, path, order = astar_ec(states, pacman, dots)
+	return len(path), num_expanded
+
+def astar_multiple_grid_search(maze, states, pacman, dots, grid):
+	path, order, num_expanded = astar_multiple_grid(grid, grid.to_id(pacman), [grid.to_id(d) for d in dots])
+	return len(path) - 1, num_expanded
+
+astar_ec_search.__name__ = 'astar_ec'
+astar_multiple_grid_search.__name__ = 'astar_multiple_grid'
+
+def algorithms_for(num_dots):
+	"""
+	Returns every search that applies to a maze with this many dots
+	"""
+	if num_dots == 1:
+		return [single_search(f) for f in SINGLE_SEARCHES.values()] + [grid_search(f) for f in [dfs_grid, bfs_grid, greedy_grid, astar_single_grid]] + [packed_search(f) for f in [dfs_grid, bfs_grid, greedy_grid]]
+	searches = [multiple_search(f) for name, f in MULTIPLE_SEARCHES.items() if name != 'astar_mst' or num_dots <= MST_DOT_LIMIT]
+	return searches + [astar_ec_search, astar_multiple_grid_search, multiple_search(corridor_multiple), multiple_search(pathfinder_multiple)]
+
+def measure(search, problem):
+	"""Runs a search REPEATS times for wall time, then once more under tracemalloc for peak memory (tracing slows it down too much to time).
+
+	Arguments:
+		search {function} -- one of the wrappers above
+		problem {tuple} -- (maze, states, pacman, dots) as returned by parse_lines, plus the maze's Grid
+
+	Returns:
+		dict -- cost, nodes_expanded, seconds and peak_bytes
+	"""
+	with contextlib.redirect_stdout(io.StringIO()):
+		seconds = None
+		for _ in range(REPEATS):
+			start_time = time.perf_counter()
+			cost, num_expanded = search(*problem)
+			elapsed = time.perf_counter() - start_time
+			seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+		tracemalloc.start()
+		search(*problem)
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+	return {'cost': cost, 'nodes_expanded': num_expanded, 'seconds': round(seconds, 6), 'peak_bytes': peak}
+
+def run_suite(suite = SUITE):
+	"""Generates every maze in the suite and runs every applicable search on it.
+
+	Returns:
+		dict -- results keyed by "maze/algorithm"
+	"""
+	results = {}
+	for name, generator, height, width, num_dots, seed in suite:
+		maze, states, pacman, dots = parse_lines(GENERATORS[generator](height, width, num_dots, seed))
+		problem = (maze, states, pacman, dots, Grid(maze)) # built once, outside the timings
+		for search in algorithms_for(len(dots)):
+			result = measure(search, problem)
+			results[name + '/' + search.__name__] = result
+			print("{0:<20} {1:<22} cost {cost:<6} expanded {nodes_expanded:<8} {seconds:.4f}s {peak_bytes:>12} bytes".format(name, search.__name__, **result))
+	return results
+
+def bound_report(suite = SUITE, bounds = BOUNDS):
+	"""Runs every bounded-suboptimal search at every bound on the single-dot mazes of the suite.
+	Shows what each bound buys: expansions and time as a fraction of plain A*'s, and the path cost as a multiple of the optimal one
+	(taken from BFS, since astar_single does not always find the shortest path).
+
+	Arguments:
+		suite {list} -- mazes in the same format as SUITE (mazes with more than one dot are skipped)
+		bounds {list of floats} -- suboptimality bounds to try
+
+	Returns:
+		list of dicts -- one row per (maze, search, bound) with the raw measurements and the three ratios
+	"""
+	rows = []
+	for name, generator, height, width, num_dots, seed in suite:
+		if num_dots != 1:
+			continue
+		maze, states, pacman, dots = parse_lines(GENERATORS[generator](height, width, num_dots, seed))
+		problem = (maze, states, pacman, dots, Grid(maze))
+		optimal_cost = measure(single_search(bfs), problem)['cost']
+		reference = measure(single_search(astar_single), problem)
+		print("{0:<20} optimal cost {1}, A*: cost {cost}, expanded {nodes_expanded}, {seconds:.4f}s".format(name, optimal_cost, **reference))
+		for search in BOUNDED_SEARCHES:
+			for bound in bounds:
+				result = measure(bounded_search(search, bound), problem)
+				row = dict(result, maze = name, algorithm = search.__name__, bound = bound,
+					cost_ratio = result['cost'] / max(1, optimal_cost),
+					expanded_ratio = result['nodes_expanded'] / max(1, reference['nodes_expanded']),
+					time_ratio = result['seconds'] / max(1e-9, reference['seconds']))
+				rows.append(row)
+				print("{0:<20} {1:<14} bound {2:<5} cost x{cost_ratio:.3f} expanded x{expanded_ratio:.3f} time x{time_ratio:.3f}".format(
+					name, search.__name__, bound, **row))
+	return rows
+
+def compare(results, baseline):
+	"""Compares a run against a saved baseline and prints every regression.
+
+	Arguments:
+		results {dict} -- output of run_suite
+		baseline {dict} -- an earlier output of run_suite
+
+	Returns:
+		list of strings -- the regressions, empty if there are none
+	"""
+	regressions = []
+	for key, result in results.items():
+		old = baseline.get(key)
+		if old is None:
+			continue
+		if result['cost'] != old['cost']:
+			regressions.append("{0}: path cost {1} -> {2}".format(key, old['cost'], result['cost']))
+		if result['nodes_expanded'] > old['nodes_expanded']:
+			regressions.append("{0}: nodes expanded {1} -> {2}".format(key, old['nodes_expanded'], result['nodes_expanded']))
+		if result['seconds'] > MIN_SECONDS and result['seconds'] > old['seconds'] * (1 + TIME_TOLERANCE):
+			regressions.append("{0}: time {1:.4f}s -> {2:.4f}s".format(key, old['seconds'], result['seconds']))
+		if result['peak_bytes'] > old['peak_bytes'] * (1 + MEMORY_TOLERANCE):
+			regressions.append("{0}: peak memory {1} -> {2} bytes".format(key, old['peak_bytes'], result['peak_bytes']))
+	for line in regressions:
+		print("REGRESSION " + line)
+	return regressions
+
+def print_usage():
+	print("To use:\npython benchmark.py [run | save <baseline.json> | compare <baseline.json> | bounds]")
+
+if __name__ == "__main__":
+	if len(sys.argv) == 2 and sys.argv[1] == 'bounds':
+		bound_report()
+		sys.exit(0)
+	if len(sys.argv) < 2 or sys.argv[1] not in ('run', 'save', 'compare') or (sys.argv[1] != 'run' and len(sys.argv) < 3):
+		print_usage()
+		sys.exit(1)
+
+	results = run_suite()
+	if sys.argv[1] == 'save':
+		with open(sys.argv[2], mode='w') as f:
+			json.dump(results, f, indent = 2, sort_keys = True)
+	elif sys.argv[1] == 'compare':
+		with open(sys.argv[2]) as f:
+			baseline = json.load(f)
+		if compare(results, baseline):
+			sys.exit(1)
+		print("No regressions")
@@ -0,0 +1,292 @@
+from utils import manhattan, trace_path, path_to_visited, PriorityFrontier
+from collections import deque
+
+"""
+Corridor contraction for the tuple searches
+Most open cells of a maze like bigMaze sit in width-1 corridors with exactly two open neighbors, and a search gains nothing by
+expanding them one at a time. CorridorGraph keeps only the cells where something can happen (junctions, dots, the start and
+the goal) and joins them with weighted edges, one per corridor, so the searches below expand one node per corridor
+and paths are expanded back into cells at the end
+Dead-end branches with nothing worth visiting in them are cut off altogether, since no shortest path between kept cells goes in one
+"""
+
+DIRS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+class CorridorGraph:
+	"""
+	Weighted graph over the junctions, dead ends and kept cells of a maze
+	edges[a] lists (b, length, corridor index) for every corridor leaving node a (two nodes can be joined by more than one),
+	and every corridor remembers the cells inside it (not counting its two end nodes), so any path over the graph can be
+	turned back into a path over the maze
+	"""
+	def __init__(self, states, keep = (), prune = True):
+		"""Contracts the maze. Every cell with other than two open neighbors becomes a node, and so does every cell in keep.
+
+		Arguments:
+			states {set of tuples} -- represents the "empty" states in the maze
+			keep {iterable of tuples} -- cells that must stay nodes (usually the start and the dots)
+			prune {bool} -- cut off dead-end branches that hold no kept cell (add_node then refuses cells in them)
+		"""
+		self.states = states
+		self.keep = set(cell for cell in keep if cell in states)
+		self.nodes = set(self.keep)
+		self.edges = {}
+		self.corridors = [] # (a, b, cells from a to b, not including a and b)
+		self.corridor_of = {} # the key is a cell inside a corridor, the value is the corridor's index
+		self.pruned = set()
+		for cell in states:
+			if len(self.open_neighbors(cell)) != 2:
+				self.nodes.add(cell)
+		for node in self.nodes:
+			self.edges[node] = []
+		for node in list(self.nodes):
+			self.walk_from(node)
+		for cell in states: # loops with no junction on them at all
+			if cell not in self.nodes and cell not in self.corridor_of:
+				self.nodes.add(cell)
+				self.edges[cell] = []
+				self.walk_from(cell)
+		if prune:
+			self.prune_dead_ends()
+
+	def open_neighbors(self, cell):
+		"""
+		Returns the open cells next to the given cell, in DIRS order
+		"""
+		neighbors = []
+		for direction in DIRS:
+			nextCoord = (cell[0] + direction[0], cell[1] + direction[1])
+			if nextCoord in self.states:
+				neighbors.append(nextCoord)
+		return neighbors
+
+	def walk_from(self, node):
+		"""
+		Follows every corridor leaving a node that has not been walked yet, and records it
+		"""
+		for first in self.open_neighbors(node):
+			if first in self.corridor_of or (first in self.nodes and first < node):
+				continue # walked already, from its other end
+			prev, curr, cells = node, first, []
+			while curr not in self.nodes:
+				cells.append(curr)
+				prev, curr = curr, [n for n in self.open_neighbors(curr) if n != prev][0]
+			self.add_corridor(node, curr, cells)
+
+	def add_corridor(self, a, b, cells):
+		"""Records a corridor from a to b and the edges for it.
+
+		Arguments:
+			a {tuple} -- node at one end
+			b {tuple} -- node at the other end
+			cells {list of tuples} -- the cells in between, in order from a to b
+		"""
+		index = len(self.corridors)
+		self.corridors.append((a, b, cells))
+		for cell in cells:
+			self.corridor_of[cell] = index
+		if a == b:
+			return # a loop back to the same node is never on a shortest path
+		self.edges[a].append((b, len(cells) + 1, index))
+		self.edges[b].append((a, len(cells) + 1, index))
+
+	def prune_dead_ends(self):
+		"""
+		Repeatedly drops every node that is not kept and has only one corridor, along with that corridor
+		A junction left with two corridors is then just part of a longer corridor, so the two are merged through it
+		"""
+		stack = [node for node in self.nodes if len(self.edges[node]) <= 2]
+		while stack:
+			node = stack.pop()
+			if node not in self.nodes or node in self.keep or self.has_loop(node):
+				continue
+			edges = self.edges[node]
+			if len(edges) == 1:
+				other, _, index = edges[0]
+				self.pruned.add(node)
+				for cell in self.corridors[index][2]:
+					del self.corridor_of[cell]
+					self.pruned.add(cell)
+				self.remove_node(node, [index])
+				stack.append(other)
+			elif len(edges) == 2 and edges[0][2] != edges[1][2]:
+				(a, _, first), (b, _, second) = edges
+				cells = self.cells_between(a, node, first) + [node] + self.cells_between(node, b, second)
+				self.remove_node(node, [first, second])
+				self.add_corridor(a, b, cells)
+				stack.extend([a, b])
+
+	def has_loop(self, node):
+		"""
+		Returns true if a corridor leaves the node and comes back to it (such a corridor has no edge, so the node cannot be merged away)
+		"""
+		return any(a == b == node for a, b, _ in (self.corridors[self.corridor_of[n]] for n in self.open_neighbors(node) if n in self.corridor_of))
+
+	def remove_node(self, node, indices):
+		"""
+		Takes a node out of the graph along with the given corridors leaving it
+		"""
+		for other, _, _ in self.edges.pop(node):
+			if other != node and other in self.edges:
+				self.edges[other] = [edge for edge in self.edges[other] if edge[2] not in indices]
+		for index in indices:
+			a, b, _ = self.corridors[index]
+			self.corridors[index] = (a, b, []) # nothing points at it any more
+		self.nodes.discard(node)
+
+	def add_node(self, cell):
+		"""Makes a cell inside a corridor into a node by splitting the corridor in two, so a graph built once can serve any start and goal.
+
+		Arguments:
+			cell {tuple} -- an open cell
+		"""
+		if cell in self.nodes or cell not in self.states:
+			return
+		if cell in self.pruned:
+			raise ValueError("{0} is in a pruned dead end, build the graph with it in keep".format(cell))
+		index = self.corridor_of.pop(cell)
+		a, b, cells = self.corridors[index]
+		i = cells.index(cell)
+		for end in (a, b):
+			self.edges[end] = [edge for edge in self.edges[end] if edge[2] != index]
+		self.corridors[index] = (a, b, []) # nothing points at it any more
+		self.nodes.add(cell)
+		self.keep.add(cell)
+		self.edges[cell] = []
+		self.add_corridor(a, cell, cells[:i])
+		self.add_corridor(cell, b, cells[i + 1:])
+
+	def stats(self):
+		"""
+		Returns the size of the contraction: open cells looked at to build the graph, and the nodes and corridors left
+		This work is done once per graph, so it is kept apart from the node expansions the searches report
+		"""
+		return {'cells': len(self.states), 'nodes': len(self.nodes), 'corridors': sum(len(edges) for edges in self.edges.values()) // 2}
+
+	def cells_between(self, a, b, index = None):
+		"""
+		Returns the cells inside the given corridor (by default the shortest one) from a to b, in order from a to b
+		"""
+		if index is None:
+			_, _, index = min(edge for edge in self.edges[a] if edge[0] == b)
+		start, end, cells = self.corridors[index]
+		return cells if start == a else cells[::-1]
+
+	def expand(self, node_path):
+		"""Turns a list of adjacent nodes into the full cell path.
+
+		Arguments:
+			node_path {list of tuples} -- nodes from the first to the last
+
+		Returns:
+			list of tuples -- every cell on the way, including both ends
+		"""
+		path = node_path[:1]
+		for a, b in zip(node_path, node_path[1:]):
+			path.extend(self.cells_between(a, b))
+			path.append(b)
+		return path
+
+def search_graph(graph, start, is_goal, heuristic):
+	"""A* over a corridor graph (Dijkstra when the heuristic is always 0).
+
+	Arguments:
+		graph {CorridorGraph} -- the contracted maze, with start as a node
+		start {tuple} -- the node to search from
+		is_goal {function} -- returns true for a node the search can stop at
+		heuristic {function} -- lower bound on the cost from a node to the goal
+
+	Returns:
+		tuple, dict, int -- the goal node reached (None if none is reachable), the node parents and the number of nodes expanded
+	"""
+	parents, costs = {start: start}, {start: 0}
+	frontier, num_expanded = PriorityFrontier(), 0
+	frontier.push(start, heuristic(start))
+	while frontier:
+		node, _ = frontier.pop()
+		num_expanded += 1
+		if is_goal(node):
+			return node, parents, num_expanded
+
+		for nextNode, length, _ in graph.edges[node]:
+			cost = costs[node] + length
+			if cost < costs.get(nextNode, cost + 1):
+				if frontier.push(nextNode, cost + heuristic(nextNode)):
+					costs[nextNode] = cost
+					parents[nextNode] = node
+	return None, parents, num_expanded
+
+def single_search(states, start, goal, graph, heuristic, name):
+	if graph is None:
+		graph = CorridorGraph(states, [start, goal])
+	graph.add_node(start)
+	graph.add_node(goal)
+	end, parents, num_expanded = search_graph(graph, start, lambda node: node == goal, heuristic)
+	if end is None:
+		print("Goal unreachable using " + name)
+		return {start: start}, num_expanded
+	print("Found goal using " + name)
+	node_path = [start] + trace_path(parents, goal)[::-1]
+	return path_to_visited(graph.expand(node_path)), num_expanded
+
+def corridor_bfs(states, start, goal, graph = None):
+	"""Shortest path over the corridor graph. Edges have lengths, so this is Dijkstra rather than BFS, with the same path costs as bfs.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		graph {CorridorGraph} -- a contracted version of states to reuse, built here if not given
+
+	Returns:
+		dict, int -- a visited dict for visited_to_path and the number of graph nodes expanded (building the graph is not counted, see CorridorGraph.stats)
+	"""
+	return single_search(states, start, goal, graph, lambda node: 0, "corridor BFS")
+
+def corridor_astar(states, start, goal, graph = None):
+	"""A* over the corridor graph. Manhattan distance stays consistent, since a corridor is never shorter than the distance between its ends.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		graph {CorridorGraph} -- a contracted version of states to reuse, built here if not given
+
+	Returns:
+		dict, int -- a visited dict for visited_to_path and the number of graph nodes expanded (building the graph is not counted, see CorridorGraph.stats)
+	"""
+	return single_search(states, start, goal, graph, lambda node: manhattan(node, goal), "corridor A*")
+
+def corridor_multiple(states, start, goals, graph = None):
+	"""
+	Multiple goals over the corridor graph, with the same "next dot = closest dot" strategy as astar_multiple
+	Each leg is a Dijkstra search that stops at the first uneaten dot it pops, so "closest" is the true maze distance
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goals {list of tuples} -- list of dots that need to be reached
+		graph {CorridorGraph} -- a contracted version of states to reuse, built here if not given
+
+	Returns:
+		deque of tuples, list of tuples, int -- the full path (including the start), the order the dots were eaten in, and the number of graph nodes expanded (building the graph is not counted, see CorridorGraph.stats)
+	"""
+	if graph is None:
+		graph = CorridorGraph(states, [start] + list(goals))
+	for cell in [start] + list(goals):
+		graph.add_node(cell)
+	remaining = set(goals)
+	path, order, num_expanded = deque([start]), [], 0
+	node = start
+	while remaining:
+		dot, parents, expanded = search_graph(graph, node, lambda n: n in remaining, lambda n: 0)
+		num_expanded += expanded
+		if dot is None:
+			print("Some dots are unreachable")
+			break
+		print("Found goal at {0}".format(dot))
+		path.extend(graph.expand([node] + trace_path(parents, dot)[::-1])[1:])
+		remaining.discard(dot)
+		order.append(dot)
+		node = dot
+	return path, order, num_expanded
@@ -0,0 +1,122 @@
+from dot_distances import DotDistances
+import numpy as np
+import hashlib
+import os
+import tempfile
+
+"""
+On-disk cache for DotDistances tables, so solving the same maze again (with any algorithm) skips the BFS precomputation
+Entries are keyed by a hash of the maze layout and the dots, stored as .npy files and memory-mapped when loaded
+The least recently used entries are deleted once the cache grows past MAX_BYTES
+"""
+
+CACHE_DIR = os.environ.get('MP1_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.distance_cache'))
+MAX_BYTES = int(os.environ.get('MP1_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+TABLES = ('cell_to_dot', 'dot_to_dot')
+
+def maze_key(grid, dots):
+	"""Hashes everything a distance table depends on: the shape of the grid, which cells are open, and the dots (in order).
+
+	Arguments:
+		grid {Grid} -- the compact maze
+		dots {list of tuples} -- (x, y) coordinates of the dots
+
+	Returns:
+		string -- hex digest used as the file name prefix
+	"""
+	h = hashlib.sha256()
+	h.update(np.array([grid.height, grid.width, len(dots)], dtype=np.int64).tobytes())
+	h.update(bytes(grid.passable))
+	h.update(np.array([grid.to_id(dot) for dot in dots], dtype=np.int64).tobytes())
+	return h.hexdigest()
+
+def entry_paths(key, cache_dir):
+	return [os.path.join(cache_dir, key + '.' + table + '.npy') for table in TABLES]
+
+def load_distances(grid, dots, cache_dir = None, max_bytes = None):
+	"""Returns the DotDistances for a maze, from the cache if it is there, otherwise computing and storing it.
+
+	Arguments:
+		grid {Grid} -- the compact maze
+		dots {list of tuples} -- (x, y) coordinates of the dots
+		cache_dir {string} -- defaults to CACHE_DIR
+		max_bytes {int} -- size limit for the whole cache, defaults to MAX_BYTES
+
+	Returns:
+		DotDistances -- with memory-mapped, read-only tables when it came from the cache
+	"""
+	cache_dir = cache_dir or CACHE_DIR
+	paths = entry_paths(maze_key(grid, dots), cache_dir)
+	if all(os.path.exists(path) for path in paths):
+		try:
+			tables = [np.load(path, mmap_mode='r') for path in paths]
+		except (OSError, ValueError):
+			tables = None # truncated or corrupt entry, drop it and fall through to rebuild it
+			for path in paths:
+				try:
+					os.remove(path)
+				except FileNotFoundError:
+					pass
+		if tables is not None:
+			try:
+				for path in paths:
+					os.utime(path) # mark as recently used
+			except FileNotFoundError:
+				pass # evicted by another process since, the maps still hold the data
+			return DotDistances(grid, dots, tables[0], tables[1])
+
+	distances = DotDistances(grid, dots)
+	os.makedirs(cache_dir, exist_ok = True)
+	for path, table in zip(paths, (distances.cell_to_dot, distances.dot_to_dot)):
+		# every writer gets its own temp file, so processes building the same entry at once cannot trip over each other
+		fd, tmp_path = tempfile.mkstemp(dir = cache_dir, suffix = '.tmp')
+		try:
+			with os.fdopen(fd, mode='wb') as f:
+				np.save(f, table)
+			if os.path.exists(path):
+				os.remove(tmp_path) # lost the race, the winner's table is the same
+			else:
+				os.replace(tmp_path, path) # readers never see a half-written file
+		except BaseException:
+			if os.path.exists(tmp_path):
+				os.remove(tmp_path)
+			raise
+	evict(cache_dir, max_bytes if max_bytes is not None else MAX_BYTES)
+	return distances
+
+def evict(cache_dir, max_bytes):
+	"""Deletes the least recently used entries until the cache fits in max_bytes.
+
+	Arguments:
+		cache_dir {string} -- the cache directory
+		max_bytes {int} -- size limit for the whole cache
+
+	Returns:
+		int -- number of entries deleted
+	"""
+	entries = {}
+	for name in os.listdir(cache_dir):
+		if not name.endswith('.npy'):
+			continue
+		path = os.path.join(cache_dir, name)
+		try:
+			stat = os.stat(path)
+		except FileNotFoundError:
+			continue # another process evicted it in the meantime
+		key = name.split('.')[0]
+		size, used = entries.get(key, (0, 0))
+		entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+
+	total = sum(size for size, _ in entries.values())
+	deleted = 0
+	for key, (size, _) in sorted(entries.items(), key = lambda e: e[1][1]):
+		if total <= max_bytes:
+			break
+		for path in entry_paths(key, cache_dir):
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+		total -= size
+		deleted += 1
+	return deleted
@@ -0,0 +1,220 @@
+import numpy as np
+from grid import Grid
+
+INF = 2 ** 30 # distance stored for cells a search never reaches (walls included), small enough to add together safely
+
+def bfs_distances(grid, sources):
+	"""Level-by-level breadth first search from one or more sources, vectorized with numpy.
+
+	Arguments:
+		grid {Grid} -- the compact maze
+		sources {list of ints} -- cell ids to measure from (several sources gives the distance to the closest one)
+
+	Returns:
+		numpy array -- true maze distance from the nearest source for every cell id, INF where unreachable
+	"""
+	passable = np.frombuffer(grid.passable, dtype=np.uint8).astype(bool)
+	offsets = np.array(grid.offsets, dtype=np.int64)
+	dist = np.full(grid.size, INF, dtype=np.int32)
+	frontier = np.unique(np.asarray(sources, dtype=np.int64))
+	dist[frontier] = 0
+	d = 0
+	while frontier.size:
+		d += 1
+		nbrs = (frontier[:, None] + offsets).ravel()
+		nbrs = np.unique(nbrs[passable[nbrs] & (dist[nbrs] == INF)])
+		dist[nbrs] = d
+		frontier = nbrs
+	return dist
+
+class DotDistances:
+	"""
+	Exact maze distances from every cell to every dot, computed once with one BFS per dot
+	After that every query is a table lookup, instead of rebuilding a manhattan table each time a dot is eaten
+	cell_to_dot is a (number of dots) x (grid size) array, dot_to_dot is the (number of dots) x (number of dots) slice of it
+	"""
+	def __init__(self, grid, dots, cell_to_dot = None, dot_to_dot = None):
+		"""Runs the BFS for every dot and fills in the tables.
+
+		Arguments:
+			grid {Grid} -- the compact maze
+			dots {list of tuples} -- (x, y) coordinates of the dots
+			cell_to_dot {numpy array} -- a table computed earlier (see distance_cache), skips the BFS
+			dot_to_dot {numpy array} -- the matching dot to dot table, sliced out of cell_to_dot if not given
+		"""
+		self.grid = grid
+		self.dots = list(dots)
+		self.cells = np.array([grid.to_id(dot) for dot in self.dots], dtype=np.int64)
+		self.index = {dot: i for i, dot in enumerate(self.dots)}
+		self.cell_index = {int(cell): i for i, cell in enumerate(self.cells)}
+		if cell_to_dot is None:
+			cell_to_dot = np.empty((len(self.dots), grid.size), dtype=np.int32)
+			for i in range(len(self.dots)):
+				cell_to_dot[i] = bfs_distances(grid, [self.cells[i]])
+		self.cell_to_dot = cell_to_dot
+		self.dot_to_dot = cell_to_dot[:, self.cells] if dot_to_dot is None else dot_to_dot
+		self.mst_cache = {} # the key is a bitmask of dots, the value is the weight of their minimum spanning tree
+
+	@classmethod
+	def from_states(cls, states, dots):
+		"""
+		Builds the tables straight from utils.parse_file output
+		"""
+		return cls(Grid.from_states(states), dots)
+
+	def distance(self, coord, dot):
+		"""Returns the true maze distance between a coordinate and a dot.
+
+		Arguments:
+			coord {tuple} -- (x, y) coordinate
+			dot {tuple} -- (x, y) coordinate of one of the dots
+
+		Returns:
+			int -- number of steps, INF if the dot can't be reached
+		"""
+		return int(self.cell_to_dot[self.index[dot], self.grid.to_id(coord)])
+
+	def nearest_dot(self, coord, remaining):
+		"""Returns the remaining dot closest to a coordinate by true maze distance (ties go to the first in the list).
+
+		Arguments:
+			coord {tuple} -- (x, y) coordinate
+			remaining {list of tuples} -- dots that are still left
+
+		Returns:
+			tuple -- the closest dot
+		"""
+		cell = self.grid.to_id(coord)
+		rows = [self.index[dot] for dot in remaining]
+		return remaining[int(np.argmin(self.cell_to_dot[rows, cell]))]
+
+	def nearest_field(self, remaining):
+		"""Distance from every cell to the closest remaining dot, used as the A* heuristic.
+
+		Arguments:
+			remaining {list of tuples} -- dots that are still left
+
+		Returns:
+			numpy array -- indexed by cell id, all zeros if no dots are left
+		"""
+		if not remaining:
+			return np.zeros(self.grid.size, dtype=np.int32)
+		rows = [self.index[dot] for dot in remaining]
+		return self.cell_to_dot[rows].min(axis = 0)
+
+	def path_to(self, coord, dot):
+		"""Rebuilds a shortest path to a dot by walking down its distance field, no search needed.
+
+		Arguments:
+			coord {tuple} -- (x, y) coordinate to start from
+			dot {tuple} -- (x, y) coordinate of the dot
+
+		Returns:
+			list of tuples -- the path, not including coord but including the dot (empty if unreachable)
+		"""
+		row = self.cell_to_dot[self.index[dot]]
+		cell = self.grid.to_id(coord)
+		d = int(row[cell])
+		path = []
+		if d >= INF:
+			return path
+		while d > 0:
+			for offset in self.grid.offsets:
+				if row[cell + offset] == d - 1:
+					cell += offset
+					break
+			d -= 1
+			path.append(self.grid.to_coord(cell))
+		return path
+
+	def mst_weight(self, mask):
+		"""Weight of the minimum spanning tree over a set of dots, using true maze distances (Prim's algorithm).
+		Results are cached by mask, since A* asks about the same sets of remaining dots over and over.
+
+		Arguments:
+			mask {int} -- bitmask of dot indices, bit i set means self.dots[i] is in the set
+
+		Returns:
+			int -- total edge weight of the tree, 0 for zero or one dots
+		"""
+		weight = self.mst_cache.get(mask)
+		if weight is not None:
+			return weight
+		rows = [i for i in range(len(self.dots)) if mask >> i & 1]
+		weight = 0
+		if len(rows) > 1:
+			sub = self.dot_to_dot[np.ix_(rows, rows)].astype(np.int64)
+			in_tree = np.zeros(len(rows), dtype=bool)
+			in_tree[0] = True
+			best = sub[0].copy()
+			for _ in range(len(rows) - 1):
+				best[in_tree] = INF * 2
+				j = int(np.argmin(best))
+				weight += int(best[j])
+				in_tree[j] = True
+				best = np.minimum(best, sub[j])
+		self.mst_cache[mask] = weight
+		return weight
+
+class NearestField:
+	"""
+	Distance from every cell to the closest remaining dot, kept up to date as dots are eaten
+	Every open cell remembers which dot is its closest (nearest), and every dot keeps the list of cells it is closest to (members),
+	so eating a dot only recomputes the cells that belonged to it instead of the whole maze
+	"""
+	def __init__(self, distances, remaining):
+		"""Builds the field for the given dots.
+
+		Arguments:
+			distances {DotDistances} -- the precomputed tables
+			remaining {list of tuples} -- dots that are still left
+		"""
+		self.distances = distances
+		self.remaining = set(distances.index[dot] for dot in remaining)
+		self.field = np.full(distances.grid.size, INF, dtype=np.int32) # indexed by cell id, walls stay INF
+		self.nearest = np.full(distances.grid.size, -1, dtype=np.int32)
+		self.members = {}
+		cells = np.flatnonzero(np.frombuffer(distances.grid.passable, dtype=np.uint8))
+		if not self.remaining:
+			self.field[cells] = 0
+			return
+		self.assign(cells)
+
+	def assign(self, cells):
+		"""
+		Finds the closest remaining dot for each of the given cells and files them under it
+		"""
+		rows = np.array(sorted(self.remaining), dtype=np.int64)
+		sub = self.distances.cell_to_dot[np.ix_(rows, cells)]
+		best = sub.argmin(axis = 0)
+		owners = rows[best]
+		self.field[cells] = sub[best, np.arange(len(cells))]
+		self.nearest[cells] = owners
+		for owner in np.unique(owners):
+			mine = cells[owners == owner]
+			old = self.members.get(int(owner))
+			self.members[int(owner)] = mine if old is None else np.concatenate([old, mine])
+
+	def remove(self, dot):
+		"""Marks a dot as eaten and updates the cells whose closest dot it was.
+
+		Arguments:
+			dot {tuple} -- (x, y) coordinate of the dot
+
+		Returns:
+			int -- the number of cells that had to be recomputed
+		"""
+		i = self.distances.index[dot]
+		self.remaining.discard(i)
+		cells = self.members.pop(i, None)
+		if cells is None or not len(cells):
+			return 0
+		if not self.remaining:
+			self.field[cells] = 0
+			self.nearest[cells] = -1
+		else:
+			self.assign(cells)
+		return len(cells)
+
+	def __getitem__(self, cell):
+		return int(self.field[cell])
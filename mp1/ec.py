@@ -1,48 +1,78 @@
-from utils import manhattan, visited_to_path
-from maze_graphics import *
+from utils import visited_to_path, PriorityFrontier
+from dot_distances import DotDistances, NearestField, INF
+from grid import Grid
+from instrument import EventLog
+from replay import frames, export_frames, EVENTS_PER_FRAME
 import copy
-import time
+import numpy as np
 
 DIRS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+TILE_ROWS = 256 # rows get_distances transforms at once
+MAX_TABLE_BYTES = 1 << 30 # largest DotDistances astar_ec builds for itself, past that it falls back to ManhattanField
+PAIRS_PER_CHUNK = 1 << 20 # (cell, dot) distances ManhattanField works out at once
 """
 TODO:
 1. Trace path with numbers instead of dots
 2. Come up with a more clever heuristic function than manhattan distance
 3. Come up with a more clever dot selection strategy than "pick whichever dot is closest to the current node" 
 """
-def astar_ec(states, start, goals):
+def astar_ec(states, start, goals, distances = None, observer = None):
 	goals = copy.deepcopy(goals)
-	visited, path = {}, []
-	distances = get_distances(states, goals)
-	nodes, num_expanded = [], 0
-	start_node = (start, distances.get(start), 0)
-	nodes.append(start_node)
+	if observer is not None: # see instrument.SearchObserver
+		observer.phase('distances')
+	if distances is None:
+		grid = Grid.from_states(states)
+		if len(goals) * grid.size * 4 <= MAX_TABLE_BYTES: # one int32 per cell for every dot
+			distances = DotDistances(grid, goals) # one BFS per dot, reused for every dot eaten
+	else:
+		grid = distances.grid
+	visited, costs, path = {}, {}, []
+	if observer is not None:
+		observer.phase('field')
+	if distances is not None:
+		field = NearestField(distances, goals) # true maze distance to the closest dot, indexed by cell id
+	else:
+		field = ManhattanField(grid, goals) # too many dots for the tables, Manhattan distance to the closest dot instead
+	frontier, num_expanded = PriorityFrontier(), 0
+	frontier.push(start, field[grid.to_id(start)])
 	visited[start] = start
+	costs[start] = 0
 	order = []
-	while nodes:
-		min_node = min(nodes, key = lambda x:x[1])
-		coord, h, cost = min_node
-		nodes.remove(min_node)
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
+	while frontier:
+		coord, h = frontier.pop()
+		cost = costs[coord]
 		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(frontier))
 		if coord in goals:
 			#print(coord)
 			order.append(coord)
 			goals.remove(coord)
-			distances = get_distances(states, goals)
+			field.remove(coord) # only the cells that were closest to this dot change
 			path.extend(visited_to_path(visited, coord))
+			if observer is not None:
+				observer.goal(coord, visited)
 			visited.clear()
 			visited[coord] = coord
-			nodes = []
+			frontier = PriorityFrontier()
 
 		if len(goals) ==0:
 			print("done")
+			if observer is not None:
+				observer.finish(True)
 			return num_expanded, path, order
 
 		for direction in DIRS:
 			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
 			if nextCoord in states and nextCoord not in visited:
-				nodes.append((nextCoord, cost + distances.get(nextCoord), cost+1))
+				frontier.push(nextCoord, cost + field[grid.to_id(nextCoord)])
 				visited[nextCoord] = coord
+				costs[nextCoord] = cost + 1
+				if observer is not None:
+					observer.push(nextCoord, coord)
 			"""
 			val = visited.get(nextCoord)
 			if nextCoord in states:
@@ -56,80 +86,144 @@ def astar_ec(states, start, goals):
 						visited[nextCoord] = coord
 						"""
 
-def astar_ec_anim(states, start, goals, maze):
-	win = draw_maze(maze)
-	win.getMouse()
-	prev_coord = (start)
+	if observer is not None:
+		observer.finish(False)
 
-	goals = copy.deepcopy(goals)
-	visited, path = {}, []
-	distances = get_distances(states, goals)
-	nodes, num_expanded = [], 0
-	start_node = (start, distances.get(start), 0)
-	nodes.append(start_node)
-	visited[start] = start
-	order = []
-	while nodes:
-		min_node = min(nodes, key = lambda x:x[1])
-		coord, h, cost = min_node
-		nodes.remove(min_node)
-		num_expanded += 1
-		draw_path(win, reversed(prev_coord))
-		
-		if coord in goals:
-			#print(coord)
-			order.append(coord)
-			goals.remove(coord)
-			distances = get_distances(states, goals)
-			path.extend(visited_to_path(visited, coord))
-			
-			for node in nodes:
-				draw_empty(win, reversed(node[0]))
-				if node[0] in goals:
-					draw_dot(win, reversed(node[0]))
-			for k in visited:
-				draw_empty(win, reversed(k))
-				if k in goals:
-					draw_dot(win, reversed(k))
-			#for g in goals:
-				#draw_dot(win, reversed(g))
-
-			nodes = []
-			visited.clear()
-			visited[coord] = coord
+def astar_ec_anim(states, start, goals, maze, distances = None, events_per_frame = EVENTS_PER_FRAME, fps = 30):
+	"""
+	Runs astar_ec once while recording its events, then plays them back on a MazeCanvas after a click
+	Returns the same as astar_ec, plus the window
+	"""
+	from maze_graphics import MazeCanvas # imported here so ec works without a display
+	log = EventLog()
+	num_expanded, path, order = astar_ec(states, start, goals, distances, log)
+	canvas = MazeCanvas(maze)
+	canvas.win.getMouse()
+	canvas.play(frames(log.events, goals, events_per_frame), fps)
+	return num_expanded, path, order, canvas.win
 
-		
-		draw_pacman(win, reversed(coord))
-		if len(goals) ==0:
-			print("done")
-			return num_expanded, path, order, win
+def astar_ec_frames(states, start, goals, maze, output_dir, distances = None, events_per_frame = EVENTS_PER_FRAME, cell_size = 4):
+	"""
+	Headless version of astar_ec_anim: runs astar_ec and writes the animation out as numbered PNG frames
+	Returns the same as astar_ec, plus the number of frames written
+	"""
+	log = EventLog()
+	num_expanded, path, order = astar_ec(states, start, goals, distances, log)
+	count = export_frames(maze, frames(log.events, goals, events_per_frame), output_dir, cell_size)
+	return num_expanded, path, order, count
 
-		for direction in DIRS:
-			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
-			if nextCoord in states and nextCoord not in visited:
-				nodes.append((nextCoord, cost + distances.get(nextCoord), cost+1))
-				visited[nextCoord] = coord
-				draw_extends(win, reversed(nextCoord))
-				if nextCoord in goals:
-					draw_dot(win, reversed(nextCoord))
-
-		prev_coord = coord
-		time.sleep(0.1)
-
-
-def get_distances(states, goals):
-	results = {}
-	for state in states:
-		if state in goals:
-			results[state] = 0
-			continue
-
-		smallest = -1
-		for goal in goals:
-			dist = manhattan(state, goal)
-			smallest = dist if (dist < smallest or smallest == -1) else smallest
-			if smallest == 1:
-				break
-		results[state] = smallest
-
-	return results
\ No newline at end of file
+
+def get_distances(states, goals, grid = None):
+	"""Manhattan distance to the closest goal for every cell at once, ignoring walls.
+	L1 distance is separable, so this is two 1-D distance transforms, along the rows and then down the columns, each a pair of
+	running minimums over the whole grid. That is O(cells) however many goals there are, and the closest goal's index is carried along.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		goals {list of tuples} -- the dots
+		grid {Grid} -- the compact maze the result is indexed by, built from states if not given
+
+	Returns:
+		numpy array, numpy array -- distance to the closest goal and that goal's index in goals, both indexed by cell id (-1 everywhere if there are no goals)
+	"""
+	if grid is None:
+		grid = Grid.from_states(states)
+	shape = (grid.height + 2, grid.stride)
+	field = np.full(shape, -1 if not goals else INF, dtype=np.int64)
+	nearest = np.full(shape, -1, dtype=np.int32)
+	if goals:
+		rows, cols = np.divmod(np.array([grid.to_id(goal) for goal in goals]), grid.stride)
+		field[rows, cols] = 0
+		nearest[rows[::-1], cols[::-1]] = np.arange(len(goals))[::-1] # the first goal in the list wins a shared cell
+		sweep(field, nearest)
+		sweep(field.T, nearest.T)
+	return field.ravel(), nearest.ravel()
+
+class ManhattanField:
+	"""
+	Stand-in for dot_distances.NearestField when there are no DotDistances: Manhattan distance to the closest remaining dot
+	Needs no per-dot tables at all. get_distances builds the field and says which dot is closest to every cell, and like NearestField,
+	every dot keeps the cells it is closest to (members), so eating a dot only recomputes those cells
+	"""
+	def __init__(self, grid, remaining):
+		"""Builds the field for the given dots.
+
+		Arguments:
+			grid {Grid} -- the compact maze
+			remaining {list of tuples} -- dots that are still left
+		"""
+		self.grid = grid
+		self.index = {dot: i for i, dot in enumerate(remaining)}
+		self.remaining = set(range(len(remaining)))
+		self.dot_rows, self.dot_cols = np.divmod(np.array([grid.to_id(dot) for dot in remaining], dtype=np.int64), grid.stride)
+		self.members = {}
+		cells = np.flatnonzero(np.frombuffer(grid.passable, dtype=np.uint8))
+		if not self.remaining:
+			self.field = np.zeros(grid.size, dtype=np.int64)
+			return
+		self.field, nearest = get_distances(None, list(remaining), grid)
+		self.file(cells, nearest[cells])
+
+	def file(self, cells, owners):
+		"""
+		Files each cell under the dot that is closest to it
+		"""
+		for owner in np.unique(owners):
+			mine = cells[owners == owner]
+			old = self.members.get(int(owner))
+			self.members[int(owner)] = mine if old is None else np.concatenate([old, mine])
+
+	def assign(self, cells):
+		"""
+		Finds the closest remaining dot for each of the given cells, a chunk of cells at a time, and files them under it
+		"""
+		rows = np.array(sorted(self.remaining), dtype=np.int64)
+		dot_rows, dot_cols = self.dot_rows[rows], self.dot_cols[rows]
+		step = max(1, PAIRS_PER_CHUNK // len(rows))
+		for start in range(0, len(cells), step):
+			chunk = cells[start:start + step]
+			xs, ys = np.divmod(chunk, self.grid.stride)
+			sub = np.abs(xs[:, None] - dot_rows) + np.abs(ys[:, None] - dot_cols)
+			best = sub.argmin(axis = 1)
+			self.field[chunk] = sub[np.arange(len(chunk)), best]
+			self.file(chunk, rows[best])
+
+	def remove(self, dot):
+		"""Marks a dot as eaten and updates the cells whose closest dot it was.
+
+		Arguments:
+			dot {tuple} -- (x, y) coordinate of the dot
+
+		Returns:
+			int -- the number of cells that had to be recomputed
+		"""
+		i = self.index[dot]
+		self.remaining.discard(i)
+		cells = self.members.pop(i, None)
+		if cells is None or not len(cells):
+			return 0
+		if not self.remaining:
+			self.field[cells] = 0
+		else:
+			self.assign(cells)
+		return len(cells)
+
+	def __getitem__(self, cell):
+		return int(self.field[cell])
+
+def sweep(field, nearest, tile_rows = TILE_ROWS):
+	"""
+	1-D distance transform along the second axis, in place, as running minimums instead of a loop over columns:
+	left to right, d[y] = y + min over y' <= y of (d[y'] - y'), then the same right to left
+	The closest goal follows from where each running minimum was last achieved. Rows go tile_rows at a time to bound the temporaries
+	"""
+	index = np.arange(field.shape[1])
+	for start in range(0, field.shape[0], tile_rows):
+		for flip in (False, True):
+			f = field[start:start + tile_rows, ::-1] if flip else field[start:start + tile_rows]
+			n = nearest[start:start + tile_rows, ::-1] if flip else nearest[start:start + tile_rows]
+			shifted = f - index
+			best = np.minimum.accumulate(shifted, axis = 1)
+			source = np.maximum.accumulate(np.where(shifted == best, index, 0), axis = 1)
+			f[:] = best + index
+			n[:] = np.take_along_axis(n, source, axis = 1)
@@ -0,0 +1,279 @@
+from array import array
+from utils import PACMAN, WALL, DOT, trace_path
+import numpy as np
+import os
+
+CHUNK_BYTES = 1 << 24 # how much of a maze file Grid.from_file looks at in one go
+WHITESPACE = np.array([ord(c) for c in ' \t\r\n\x0b\x0c'], dtype=np.uint8)
+
+def row_bounds(data, chunk_bytes = CHUNK_BYTES):
+	"""Finds where every row of a maze file starts and ends, scanning chunk_bytes at a time for line breaks.
+	Line breaks are '\\n', '\\r\\n' or a lone '\\r', as when reading in text mode, and like str.strip, whitespace at either end of a row is left out.
+
+	Arguments:
+		data {numpy array} -- the file's bytes (usually a memmap)
+		chunk_bytes {int} -- how many bytes to scan at once
+
+	Returns:
+		numpy array, numpy array -- start offsets and end offsets (exclusive), one pair per row
+	"""
+	breaks = []
+	for offset in range(0, len(data), chunk_bytes):
+		chunk = data[offset:offset + chunk_bytes]
+		following = np.zeros(len(chunk), dtype=np.uint8) # the byte after each one, across the chunk boundary too
+		following[:-1] = chunk[1:]
+		if offset + len(chunk) < len(data):
+			following[-1] = data[offset + len(chunk)]
+		is_break = (chunk == ord('\n')) | ((chunk == ord('\r')) & (following != ord('\n')))
+		breaks.append(np.flatnonzero(is_break) + offset)
+	ends = np.concatenate(breaks + [np.array([len(data)])])
+	if ends[-1] == len(data) and len(ends) > 1 and ends[-2] == len(data) - 1:
+		ends = ends[:-1] # a final newline does not start another row
+	starts = np.concatenate([[0], ends[:-1] + 1])
+	for i in range(len(starts)): # trimming looks at a few bytes per row at most
+		start, end = starts[i], ends[i]
+		while start < end and data[start] in WHITESPACE:
+			start += 1
+		while end > start and data[end - 1] in WHITESPACE:
+			end -= 1
+		starts[i], ends[i] = start, end
+	return starts, ends
+
+class Grid:
+	"""
+	A compact, array-backed version of a parsed maze
+	Every cell gets an integer id instead of an (x, y) tuple, and passability is a flat bytearray (1 byte per cell)
+	The grid is padded with a ring of walls so neighbors can be found by adding an offset without any bounds checks
+	Cell ids follow the same (row, column) convention as the rest of mp1: id = (x + 1) * stride + (y + 1)
+	"""
+	def __init__(self, maze):
+		"""Builds the grid from the list-of-lists maze returned by utils.parse_file.
+
+		Arguments:
+			maze {list} -- a list carrying the maze
+		"""
+		self._allocate(len(maze), max(len(row) for row in maze) if maze else 0)
+
+		for x in range(self.height):
+			row = maze[x]
+			base = (x + 1) * self.stride + 1
+			for y in range(len(row)):
+				c = row[y]
+				if c != WALL:
+					self.passable[base + y] = 1
+				if c == DOT:
+					self.dots.append(base + y)
+				elif c == PACMAN:
+					self.pacman = base + y
+
+	def _allocate(self, height, width):
+		"""
+		Sets up an all-wall grid of the given size with no pacman and no dots
+		"""
+		self.height = height
+		self.width = width
+		self.stride = self.width + 2
+		self.size = (self.height + 2) * self.stride
+		self.passable = bytearray(self.size)
+		self.offsets = (self.stride, 1, -self.stride, -1) # same order as DIRS in maze_search
+		self.pacman = -1
+		self.dots = []
+
+	@classmethod
+	def from_file(cls, file, chunk_bytes = CHUNK_BYTES):
+		"""Parses a maze text file straight into a grid, without ever building the maze as Python lists or strings.
+		The file is memory-mapped and handled a block of rows at a time, with numpy comparisons for walls, dots and pacman,
+		so memory stays at the grid itself plus one block, and big files are limited by I/O rather than per-character work.
+		Rows are stripped of surrounding whitespace the same way utils.parse_file does.
+
+		Arguments:
+			file {string} -- file name
+			chunk_bytes {int} -- roughly how many bytes of the file to handle at once
+
+		Returns:
+			Grid -- the same grid Grid(parse_file(file)[0]) would build
+		"""
+		grid = cls.__new__(cls)
+		if os.path.getsize(file) == 0:
+			grid._allocate(0, 0)
+			return grid
+		data = np.memmap(file, dtype=np.uint8, mode='r')
+		starts, ends = row_bounds(data, chunk_bytes)
+		grid._allocate(len(starts), int((ends - starts).max(initial = 0)))
+
+		cells = np.frombuffer(grid.passable, dtype=np.uint8).reshape(grid.height + 2, grid.stride)
+		dots, pacman = [], -1
+		block_rows = max(1, chunk_bytes // grid.stride)
+		block = np.zeros((block_rows, grid.stride), dtype=np.uint8)
+		for first in range(0, grid.height, block_rows):
+			n = min(block_rows, grid.height - first)
+			block[:n] = 0
+			for i in range(n):
+				start, end = starts[first + i], ends[first + i]
+				block[i, 1:1 + end - start] = data[start:end]
+			chars = block[:n]
+			cells[first + 1:first + 1 + n] = (chars != 0) & (chars != ord(WALL))
+			base = (first + 1) * grid.stride # id of the block's first (padding) cell
+			dots.extend((np.flatnonzero(chars == ord(DOT)) + base).tolist())
+			found = np.flatnonzero(chars == ord(PACMAN))
+			if len(found):
+				pacman = int(found[-1]) + base # the last one wins, like parse_file
+		grid.dots, grid.pacman = dots, pacman
+		del data
+		return grid
+
+	@classmethod
+	def from_states(cls, states):
+		"""Builds a grid from the set of open states returned by utils.parse_file, for searches that never see the maze itself.
+
+		Arguments:
+			states {set of tuples} -- represents the "empty" states in the maze
+
+		Returns:
+			Grid -- the compact maze (pacman and dots are not set)
+		"""
+		height = max(s[0] for s in states) + 1 if states else 0
+		width = max(s[1] for s in states) + 1 if states else 0
+		maze = [[WALL] * width for _ in range(height)]
+		for x, y in states:
+			maze[x][y] = ' '
+		return cls(maze)
+
+	def __contains__(self, cell):
+		"""
+		Returns true if the cell id is an open (non-wall) cell
+		"""
+		return 0 <= cell < self.size and self.passable[cell] == 1
+
+	def __len__(self):
+		"""
+		Returns the number of open cells
+		"""
+		return self.passable.count(1)
+
+	def to_id(self, coord):
+		"""Converts an (x, y) coordinate into a cell id.
+
+		Arguments:
+			coord {tuple} -- (row, column) coordinate
+
+		Returns:
+			int -- the cell id
+		"""
+		return (coord[0] + 1) * self.stride + coord[1] + 1
+
+	def to_coord(self, cell):
+		"""Converts a cell id back into an (x, y) coordinate.
+
+		Arguments:
+			cell {int} -- the cell id
+
+		Returns:
+			tuple -- (row, column) coordinate
+		"""
+		x, y = divmod(cell, self.stride)
+		return (x - 1, y - 1)
+
+	def to_states(self):
+		"""
+		Returns the open cells as the set of (x, y) states utils.parse_file returns, for the searches that take states
+		"""
+		xs, ys = np.divmod(np.flatnonzero(np.frombuffer(self.passable, dtype=np.uint8)), self.stride)
+		return set(zip((xs - 1).tolist(), (ys - 1).tolist()))
+
+	def endpoints(self):
+		"""
+		Returns pacman and the list of dots as (x, y) coordinates, the way utils.parse_file does ((0, 0) when there is no pacman)
+		"""
+		pacman = self.to_coord(self.pacman) if self.pacman >= 0 else (0, 0)
+		return pacman, [self.to_coord(dot) for dot in self.dots]
+
+	def neighbors(self, cell):
+		"""
+		Yields the open cells next to the given cell, in DIRS order
+		"""
+		passable = self.passable
+		for offset in self.offsets:
+			n = cell + offset
+			if passable[n]:
+				yield n
+
+	def manhattan(self, a, b):
+		"""Returns the manhattan distance between two cell ids.
+
+		Arguments:
+			a {int} -- first cell id
+			b {int} -- second cell id
+
+		Returns:
+			int -- manhattan distance
+		"""
+		ax, ay = divmod(a, self.stride)
+		bx, by = divmod(b, self.stride)
+		return abs(ax - bx) + abs(ay - by)
+
+	def new_parents(self):
+		"""
+		Returns a flat parent array with every cell marked unvisited (-1)
+		Searches store parents[cell] = previous cell, and parents[start] = start
+		"""
+		return array('i', [-1]) * self.size
+
+	def new_packed_parents(self):
+		"""
+		Returns a PackedParents with every cell unvisited, a drop-in replacement for new_parents that needs 3 bits per cell instead of 32
+		"""
+		return PackedParents(self)
+
+	def parents_to_path(self, parents, goal):
+		"""Walks a parent array back from the goal, just like utils.visited_to_path.
+
+		Arguments:
+			parents {array} -- parent array filled in by one of the grid searches
+			goal {int} -- cell id the path ends at
+
+		Returns:
+			list of tuples -- the path as (x, y) coordinates, goal first and not including the start
+		"""
+		return [self.to_coord(cell) for cell in trace_path(parents, goal)]
+
+class PackedParents:
+	"""
+	Parent pointers for a search over a Grid, packed into one visited bit and one 2-bit direction code per cell
+	Every parent is a neighbor of its cell, so which of the 4 offsets leads back to it is all that needs storing. Reads and writes
+	look like the array from Grid.new_parents: parents[cell] is -1 for an unvisited cell, the cell itself for a start, and otherwise
+	the cell it was reached from, so the searches and Grid.parents_to_path work on either one unchanged
+	A 10M-cell maze needs about 3.75MB for this, against 40MB for the int array (and gigabytes for a dict of tuples)
+	"""
+	def __init__(self, grid):
+		"""
+		Arguments:
+			grid {Grid} -- the compact maze the cell ids belong to
+		"""
+		self.visited = bytearray((grid.size + 7) >> 3) # 8 cells per byte
+		self.codes = bytearray((grid.size + 3) >> 2) # 4 cells per byte, the code is an index into grid.offsets
+		self.offsets = grid.offsets
+		self.code_of = {offset: code for code, offset in enumerate(grid.offsets)} # the key is cell - parent
+		self.roots = set() # cells that are their own parent (the start, or every source of a multi-source search)
+
+	def __getitem__(self, cell):
+		if not self.visited[cell >> 3] >> (cell & 7) & 1:
+			return -1
+		if cell in self.roots:
+			return cell
+		return cell - self.offsets[self.codes[cell >> 2] >> ((cell & 3) << 1) & 3]
+
+	def __setitem__(self, cell, parent):
+		self.visited[cell >> 3] |= 1 << (cell & 7)
+		if parent == cell:
+			self.roots.add(cell)
+			return
+		self.roots.discard(cell)
+		shift = (cell & 3) << 1
+		self.codes[cell >> 2] = self.codes[cell >> 2] & ~(3 << shift) | self.code_of[cell - parent] << shift
+
+	def nbytes(self):
+		"""
+		Returns the memory the packed arrays take up, in bytes
+		"""
+		return len(self.visited) + len(self.codes)
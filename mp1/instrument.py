@@ -0,0 +1,172 @@
+import time
+import tracemalloc
+
+"""
+Instrumentation hooks for the searches
+A search that takes an observer calls its hooks as it goes, and skips them entirely when the observer is None, so an
+uninstrumented run costs one "is None" check per event and nothing else
+Profiling (SearchStats), event recording (EventLog) and the astar_ec animation all consume the same hooks
+"""
+
+class SearchObserver:
+	"""
+	Every hook a search can call, all doing nothing. Subclasses override the ones they care about
+	"""
+	def phase(self, name):
+		"""
+		A new phase of the search starts (for example "distances" or "search"), which ends the previous one
+		"""
+		pass
+
+	def push(self, coord, parent):
+		"""
+		A state was added to the frontier (or had its priority lowered), reached from parent
+		"""
+		pass
+
+	def reopen(self, coord):
+		"""
+		A closed state was put back in the frontier because a cheaper path to it turned up
+		"""
+		pass
+
+	def expand(self, coord, frontier_size):
+		"""
+		A state was taken off the frontier, with frontier_size states still waiting
+		"""
+		pass
+
+	def goal(self, coord, discarded):
+		"""
+		A goal was reached partway through a multi-goal search, which then forgets the states in discarded and starts over from coord
+		"""
+		pass
+
+	def finish(self, found):
+		"""
+		The search is over, found says whether it reached its goal(s)
+		"""
+		pass
+
+class SearchStats(SearchObserver):
+	"""
+	Counts what a search did: expansions, pushes, reopens, the biggest frontier, time per phase and (optionally) peak memory
+	"""
+	def __init__(self, track_memory = False):
+		"""
+		Arguments:
+			track_memory {bool} -- also record the memory high-water mark with tracemalloc (which slows the search down a lot)
+		"""
+		self.expanded = 0
+		self.pushed = 0
+		self.reopened = 0
+		self.goals = 0
+		self.max_frontier = 0
+		self.phases = {} # the key is a phase name, the value is the seconds spent in it
+		self.peak_bytes = None
+		self.found = None
+		self.track_memory = track_memory
+		self.current, self.phase_start = None, None
+		self.started_tracing = False
+
+	def phase(self, name):
+		now = time.perf_counter()
+		if self.current is None and self.track_memory:
+			self.started_tracing = not tracemalloc.is_tracing()
+			if self.started_tracing:
+				tracemalloc.start()
+			tracemalloc.reset_peak()
+		self.end_phase(now)
+		self.current, self.phase_start = name, now
+
+	def end_phase(self, now):
+		if self.current is not None:
+			self.phases[self.current] = self.phases.get(self.current, 0) + now - self.phase_start
+
+	def push(self, coord, parent):
+		self.pushed += 1
+
+	def reopen(self, coord):
+		self.reopened += 1
+
+	def expand(self, coord, frontier_size):
+		self.expanded += 1
+		if frontier_size > self.max_frontier:
+			self.max_frontier = frontier_size
+
+	def goal(self, coord, discarded):
+		self.goals += 1
+
+	def finish(self, found):
+		self.end_phase(time.perf_counter())
+		self.current = None
+		self.found = found
+		if self.track_memory and tracemalloc.is_tracing():
+			self.peak_bytes = tracemalloc.get_traced_memory()[1]
+			if self.started_tracing:
+				tracemalloc.stop()
+
+	def summary(self):
+		"""
+		Returns everything counted as a dict, with the phase times rounded to microseconds
+		"""
+		return {'found': self.found, 'expanded': self.expanded, 'pushed': self.pushed, 'reopened': self.reopened, 'goals': self.goals,
+			'max_frontier': self.max_frontier, 'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+			'peak_bytes': self.peak_bytes}
+
+class EventLog(SearchObserver):
+	"""
+	Records every event as a tuple, (hook name, arguments...), for replaying or inspecting a search afterwards
+	discarded states are copied, since the search clears them right after the goal event
+	"""
+	def __init__(self):
+		self.events = []
+
+	def phase(self, name):
+		self.events.append(('phase', name))
+
+	def push(self, coord, parent):
+		self.events.append(('push', coord, parent))
+
+	def reopen(self, coord):
+		self.events.append(('reopen', coord))
+
+	def expand(self, coord, frontier_size):
+		self.events.append(('expand', coord, frontier_size))
+
+	def goal(self, coord, discarded):
+		self.events.append(('goal', coord, list(discarded)))
+
+	def finish(self, found):
+		self.events.append(('finish', found))
+
+class Observers(SearchObserver):
+	"""
+	Passes every event on to several observers, in order
+	"""
+	def __init__(self, *observers):
+		self.observers = observers
+
+	def phase(self, name):
+		for observer in self.observers:
+			observer.phase(name)
+
+	def push(self, coord, parent):
+		for observer in self.observers:
+			observer.push(coord, parent)
+
+	def reopen(self, coord):
+		for observer in self.observers:
+			observer.reopen(coord)
+
+	def expand(self, coord, frontier_size):
+		for observer in self.observers:
+			observer.expand(coord, frontier_size)
+
+	def goal(self, coord, discarded):
+		for observer in self.observers:
+			observer.goal(coord, discarded)
+
+	def finish(self, found):
+		for observer in self.observers:
+			observer.finish(found)
@@ -0,0 +1,115 @@
+from utils import PACMAN, WALL, DOT
+from grid import Grid
+from dot_distances import bfs_distances, INF
+import random
+
+"""
+Reproducible synthetic mazes for benchmarking
+Every generator takes a seed and returns the maze as a list of strings, in the same format as the input files
+(so it can go straight into utils.parse_lines or be written out with write_maze)
+"""
+
+def backtracker(height, width, num_dots = 1, seed = 0):
+	"""Perfect maze (exactly one path between any two cells) carved with an iterative recursive-backtracker.
+
+	Arguments:
+		height {int} -- number of rows, rounded down to an odd number
+		width {int} -- number of columns, rounded down to an odd number
+		num_dots {int} -- number of dots to place
+		seed {int} -- random seed
+
+	Returns:
+		list of strings -- the maze
+	"""
+	rng = random.Random(seed)
+	height, width = max(3, height - (height + 1) % 2), max(3, width - (width + 1) % 2)
+	cells = [[WALL] * width for _ in range(height)]
+	cells[1][1] = ' '
+	stack = [(1, 1)]
+	while stack:
+		x, y = stack[-1]
+		options = [(dx, dy) for dx, dy in ((2, 0), (0, 2), (-2, 0), (0, -2))
+			if 0 < x + dx < height - 1 and 0 < y + dy < width - 1 and cells[x + dx][y + dy] == WALL]
+		if not options:
+			stack.pop()
+			continue
+		dx, dy = rng.choice(options)
+		cells[x + dx // 2][y + dy // 2] = ' '
+		cells[x + dx][y + dy] = ' '
+		stack.append((x + dx, y + dy))
+	return place(cells, num_dots, rng)
+
+def open_rooms(height, width, num_dots = 1, seed = 0, room_size = 8):
+	"""Square rooms separated by one-cell walls, each wall segment with a random doorway.
+
+	Arguments:
+		height {int} -- number of rows
+		width {int} -- number of columns
+		num_dots {int} -- number of dots to place
+		seed {int} -- random seed
+		room_size {int} -- inside width of each room
+
+	Returns:
+		list of strings -- the maze
+	"""
+	rng = random.Random(seed)
+	cells = [[WALL if x % (room_size + 1) == 0 or y % (room_size + 1) == 0 else ' ' for y in range(width)] for x in range(height)]
+	for x in range(height):
+		cells[x][width - 1] = WALL
+	cells[height - 1] = [WALL] * width
+	step = room_size + 1
+	for rx in range(0, height - 2, step):
+		for ry in range(0, width - 2, step):
+			if rx + step < height - 1: # doorway in the wall below this room
+				cells[rx + step][ry + 1 + rng.randrange(min(room_size, width - 2 - ry))] = ' '
+			if ry + step < width - 1: # doorway in the wall to the right of this room
+				cells[rx + 1 + rng.randrange(min(room_size, height - 2 - rx))][ry + step] = ' '
+	return place(cells, num_dots, rng)
+
+def random_obstacles(height, width, num_dots = 1, seed = 0, density = 0.3):
+	"""Open field with each inside cell turned into a wall with the given probability.
+
+	Arguments:
+		height {int} -- number of rows
+		width {int} -- number of columns
+		num_dots {int} -- number of dots to place
+		seed {int} -- random seed
+		density {float} -- chance that any one cell is a wall
+
+	Returns:
+		list of strings -- the maze
+	"""
+	rng = random.Random(seed)
+	cells = [[WALL if x in (0, height - 1) or y in (0, width - 1) or rng.random() < density else ' '
+		for y in range(width)] for x in range(height)]
+	return place(cells, num_dots, rng)
+
+def place(cells, num_dots, rng):
+	"""Puts pacman on a random open cell and the dots on random cells reachable from it.
+
+	Arguments:
+		cells {list} -- the maze as a list of lists, modified in place
+		num_dots {int} -- number of dots to place (fewer if not enough cells are reachable)
+		rng {Random} -- random source
+
+	Returns:
+		list of strings -- the maze
+	"""
+	open_cells = [(x, y) for x in range(len(cells)) for y in range(len(cells[x])) if cells[x][y] != WALL]
+	pacman = rng.choice(open_cells)
+	grid = Grid(cells)
+	dist = bfs_distances(grid, [grid.to_id(pacman)])
+	reachable = [c for c in open_cells if c != pacman and dist[grid.to_id(c)] < INF]
+	for x, y in rng.sample(reachable, min(num_dots, len(reachable))):
+		cells[x][y] = DOT
+	cells[pacman[0]][pacman[1]] = PACMAN
+	return [''.join(row) for row in cells]
+
+def write_maze(lines, output_path):
+	"""
+	Writes a generated maze out in the same format as the input files
+	"""
+	with open(output_path, mode='w') as f:
+		f.write('\n'.join(lines) + '\n')
+
+GENERATORS = {f.__name__: f for f in [backtracker, open_rooms, random_obstacles]}
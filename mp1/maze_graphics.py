@@ -24,6 +24,67 @@ def draw_maze(maze):
 				draw_dot(win, coord)
 	return win
 
+class MazeCanvas:
+	"""
+	The maze drawn once with one shape per cell, for replaying a search: cells are recolored in place instead of piling
+	new shapes on top, and the window only repaints when a whole frame has been applied
+	"""
+	def __init__(self, maze):
+		"""
+		Arguments:
+			maze {list} -- a list carrying the maze
+		"""
+		width = max(len(row) for row in maze)
+		height = len(maze)
+		self.win = GraphWin('BigMaze', width * CELL_SIZE, height * CELL_SIZE, autoflush = False)
+		self.cells, self.dots, self.shown = {}, {}, set()
+		for y in range(height):
+			for x in range(len(maze[y])):
+				c = maze[y][x]
+				cell = Rectangle(Point(x * CELL_SIZE, y * CELL_SIZE), Point((x + 1) * CELL_SIZE, (y + 1) * CELL_SIZE))
+				color = 'gray' if c == WALL else 'blue' if c == PACMAN else 'white'
+				cell.setFill(color)
+				cell.setOutline(color)
+				cell.draw(self.win)
+				if c == WALL:
+					continue
+				self.cells[(y, x)] = cell
+				if c == DOT:
+					dot = Circle(Point(x * CELL_SIZE + CELL_SIZE/2, y * CELL_SIZE + CELL_SIZE/2), CELL_SIZE / 4)
+					dot.setFill('red')
+					dot.setOutline('red')
+					dot.draw(self.win)
+					self.dots[(y, x)] = dot
+					self.shown.add((y, x))
+		update()
+
+	def paint(self, coord, color, dot):
+		"""
+		Recolors one cell (coord is (row, column), like the rest of mp1) and shows or hides its dot
+		"""
+		cell = self.cells[coord]
+		cell.setFill(color)
+		cell.setOutline(color)
+		if coord in self.dots and dot != (coord in self.shown):
+			if dot:
+				self.dots[coord].draw(self.win)
+				self.shown.add(coord)
+			else:
+				self.dots[coord].undraw()
+				self.shown.discard(coord)
+
+	def play(self, frame_iter, fps = 30):
+		"""Applies the frames from replay.frames one at a time, repainting once per frame.
+
+		Arguments:
+			frame_iter {iterable} -- output of replay.frames
+			fps {float} -- frames per second, None to go as fast as possible
+		"""
+		for changes in frame_iter:
+			for coord, (color, dot) in changes.items():
+				self.paint(coord, color, dot)
+			update(fps)
+
 def draw_rect(win, coord, color):
 	x, y = coord
 	x *= CELL_SIZE
@@ -1,21 +1,34 @@
-import queue as queue
-from utils import manhattan, get_closest_dot, visited_to_path, visited_to_path2
+from utils import manhattan, visited_to_path, visited_to_path2, visited_to_path_deque, path_to_visited, PriorityFrontier
 import copy
 from collections import deque
+import heapq
+import time
+from dot_distances import DotDistances, INF
 
 DIRS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+UNREACHABLE = -1
+SUBOPTIMALITY_BOUND = 1.5 # default cost bound for the bounded-suboptimal searches (path cost <= bound * optimal)
+IDA_TABLE_SIZE = 1 << 16 # cells ida_star's transposition table can hold
+SMA_MAX_NODES = 1 << 16 # search nodes sma_star can hold
 
-def dfs(states, start, goal):
+def dfs(states, start, goal, observer = None):
 	stack, num_expanded = [], 0;
 	visited = {} #the key is a coordinate, the value is the previous coordinate, this helps in constructing the final path
 	stack.append(start)
 	visited[start] = start
+	if observer is not None: # see instrument.SearchObserver
+		observer.phase('search')
+		observer.push(start, start)
 
 	while stack:
 		coord = stack.pop()
 		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(stack))
 		if coord == goal:
 			print("Found goal using DFS")
+			if observer is not None:
+				observer.finish(True)
 			return visited, num_expanded
 
 		for direction in DIRS:
@@ -23,81 +36,751 @@ def dfs(states, start, goal):
 			if nextCoord in states and nextCoord not in visited:
 				stack.append(nextCoord)
 				visited[nextCoord] = coord			
+				if observer is not None:
+					observer.push(nextCoord, coord)
 
-def bfs(states, start, goal):
-	q, num_expanded = queue.Queue(), 0
+	print("Goal unreachable using DFS")
+	if observer is not None:
+		observer.finish(False)
+	return visited, num_expanded # goal is not in visited, so visited_to_path gives an empty path
+
+def bfs(states, start, goal, observer = None):
+	q, num_expanded = deque(), 0 # plain deque, queue.Queue locks on every put/get and is always truthy
 	visited = {} #the key is a coordinate, the value is the previous coordinate, this helps in constructing the final path
-	q.put(start)
+	q.append(start)
 	visited[start] = start
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
 	while q:
-		coord = q.get()
+		coord = q.popleft()
 		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(q))
 		if coord == goal:
 			print("Found goal using BFS")
+			if observer is not None:
+				observer.finish(True)
 			return visited, num_expanded
 
 		for direction in DIRS:
 			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
 			if nextCoord in states and nextCoord not in visited:
-				q.put(nextCoord)
+				q.append(nextCoord)
 				visited[nextCoord] = coord
+				if observer is not None:
+					observer.push(nextCoord, coord)
+
+	print("Goal unreachable using BFS")
+	if observer is not None:
+		observer.finish(False)
+	return visited, num_expanded # goal is not in visited, so visited_to_path gives an empty path
 
-def greedy(states, start, goal):
+def greedy(states, start, goal, observer = None):
 	visited = {}
-	nodes, num_expanded = [], 0
-	start_node = (start, manhattan(start, goal))
-	nodes.append(start_node)
+	frontier, num_expanded = PriorityFrontier(), 0
+	frontier.push(start, manhattan(start, goal))
 	visited[start]  = start
-	while nodes:
-		min_node = min(nodes, key = lambda x:x[1])
-		coord = min_node[0]
-		nodes.remove(min_node)
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
+	while frontier:
+		coord, _ = frontier.pop()
 		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(frontier))
 		if coord == goal:
 			print("Found goal using Greedy BFS")
+			if observer is not None:
+				observer.finish(True)
 			return visited, num_expanded
 
 		for direction in DIRS:
 			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
 			if nextCoord in states and nextCoord not in visited:
-				nodes.append((nextCoord, manhattan(nextCoord, goal)))
+				frontier.push(nextCoord, manhattan(nextCoord, goal))
 				visited[nextCoord] = coord
+				if observer is not None:
+					observer.push(nextCoord, coord)
 
-def astar_single(states, start, goal):
-	visited = {}
-	nodes, num_expanded = [], 0
-	start_node = (start, manhattan(start, goal), 0)
-	nodes.append(start_node)
+	print("Goal unreachable using Greedy BFS")
+	if observer is not None:
+		observer.finish(False)
+	return visited, num_expanded # goal is not in visited, so visited_to_path gives an empty path
+
+def astar_single(states, start, goal, observer = None):
+	visited, costs = {}, {} # costs holds the path cost to every coordinate on the frontier
+	frontier, num_expanded = PriorityFrontier(), 0
+	frontier.push(start, manhattan(start, goal))
 	visited[start] = start
-	while nodes:
-		min_node = min(nodes, key = lambda x:x[1])
-		coord, h, cost = min_node
-		nodes.remove(min_node)
+	costs[start] = 0
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
+	while frontier:
+		coord, h = frontier.pop()
+		cost = costs[coord]
 		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(frontier))
 		if coord == goal:
 			print("Found goal using A* (single goal)")
+			if observer is not None:
+				observer.finish(True)
 			return visited, num_expanded
 
 		for direction in DIRS:
 			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
 			val = visited.get(nextCoord)
 			if nextCoord in states:
-				if val is None:
-					nodes.append((nextCoord, cost + manhattan(nextCoord, goal), cost+1))
-					visited[nextCoord] = coord
-				else:
-					new_h = cost + manhattan(nextCoord, goal)
-					if new_h < h:
-						nodes.append((nextCoord, cost + manhattan(nextCoord, goal), cost+1))
+				new_h = cost + manhattan(nextCoord, goal)
+				if val is None or new_h < h:
+					if frontier.push(nextCoord, new_h):
 						visited[nextCoord] = coord
+						costs[nextCoord] = cost + 1
+						if observer is not None:
+							observer.push(nextCoord, coord)
+
+	print("Goal unreachable using A* (single goal)")
+	if observer is not None:
+		observer.finish(False)
+	return visited, num_expanded # goal is not in visited, so visited_to_path gives an empty path
+
+def weighted_astar(states, start, goal, bound = SUBOPTIMALITY_BOUND, observer = None):
+	"""A* with the heuristic inflated by the bound, f = g + bound * h.
+	Manhattan distance is consistent, so closed states never need to be reopened and the path costs at most bound times the optimal one.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		bound {float} -- suboptimality bound (1 is plain A*)
+		observer {SearchObserver} -- instrumentation hooks, or None
+
+	Returns:
+		dict, int -- the visited dict and the number of nodes expanded
+	"""
+	visited, costs = {start: start}, {start: 0}
+	frontier, num_expanded = PriorityFrontier(), 0
+	frontier.push(start, bound * manhattan(start, goal))
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
+	while frontier:
+		coord, _ = frontier.pop()
+		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(frontier))
+		if coord == goal:
+			print("Found goal using weighted A*")
+			if observer is not None:
+				observer.finish(True)
+			return visited, num_expanded
+
+		cost = costs[coord] + 1
+		for direction in DIRS:
+			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+			if nextCoord in states and cost < costs.get(nextCoord, INF):
+				if frontier.push(nextCoord, cost + bound * manhattan(nextCoord, goal)):
+					visited[nextCoord] = coord
+					costs[nextCoord] = cost
+					if observer is not None:
+						observer.push(nextCoord, coord)
+
+	print("Goal unreachable using weighted A*")
+	if observer is not None:
+		observer.finish(False)
+	return visited, num_expanded
+
+def dynamic_astar(states, start, goal, bound = SUBOPTIMALITY_BOUND, observer = None):
+	"""Dynamically weighted A*: the heuristic weight starts at the bound and falls toward 1 as the search closes in on the goal.
+	This is Pohl's dynamic weighting with the remaining distance estimate h / h(start) in place of the depth ratio, so a state's weight never changes
+	and a cheaper path to it always lowers its priority. Every weight is between 1 and the bound, and closed states are reopened
+	when a cheaper path to them turns up, so the path still costs at most bound times the optimal one.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		bound {float} -- suboptimality bound (1 is plain A*)
+		observer {SearchObserver} -- instrumentation hooks, or None
+
+	Returns:
+		dict, int -- the visited dict and the number of nodes expanded
+	"""
+	depth = max(1, manhattan(start, goal)) # anticipated solution length
+	def priority(coord, cost):
+		h = manhattan(coord, goal)
+		return cost + (1 + (bound - 1) * min(1, h / depth)) * h
+
+	visited, costs = {start: start}, {start: 0}
+	frontier, num_expanded = PriorityFrontier(), 0
+	frontier.push(start, priority(start, 0))
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
+	while frontier:
+		coord, _ = frontier.pop()
+		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(frontier))
+		if coord == goal:
+			print("Found goal using dynamically weighted A*")
+			if observer is not None:
+				observer.finish(True)
+			return visited, num_expanded
+
+		cost = costs[coord] + 1
+		for direction in DIRS:
+			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+			if nextCoord in states and cost < costs.get(nextCoord, INF):
+				if observer is not None and nextCoord in frontier.closed:
+					observer.reopen(nextCoord)
+				frontier.reopen(nextCoord)
+				frontier.push(nextCoord, priority(nextCoord, cost))
+				visited[nextCoord] = coord
+				costs[nextCoord] = cost
+				if observer is not None:
+					observer.push(nextCoord, coord)
+
+	print("Goal unreachable using dynamically weighted A*")
+	if observer is not None:
+		observer.finish(False)
+	return visited, num_expanded
+
+def focal_astar(states, start, goal, bound = SUBOPTIMALITY_BOUND):
+	"""Focal search (A*-epsilon). The open list is ordered on f = g + h as in A*, but the state expanded next is the one closest to the goal
+	among the FOCAL states, those with f <= bound * (lowest f in open). The lowest f never exceeds the optimal cost, so the path costs
+	at most bound times the optimal one.
+	Path costs are integers, so open is kept as buckets by f, and when the lowest f rises the newly admitted buckets are moved into
+	the focal heap. Focal entries carry the path cost they were pushed with and are skipped lazily once they go stale.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		bound {float} -- suboptimality bound (1 is plain A*, with ties broken toward the goal)
+
+	Returns:
+		dict, int -- the visited dict and the number of nodes expanded
+	"""
+	visited, costs = {start: start}, {start: 0}
+	f_start = manhattan(start, goal)
+	buckets, open_f = {f_start: {start}}, {start: f_start} # open coordinates by f value, and the f value of each open coordinate
+	focal, counter = [(f_start, 0, start, 0)], 1 # heap of (h, insertion order, coordinate, path cost)
+	f_min, f_focal = f_start, f_start # f_focal is the largest f value whose bucket has been moved into focal
+	num_expanded = 0
+
+	while buckets:
+		while f_min not in buckets:
+			f_min += 1 # with a consistent heuristic the lowest f only ever rises
+		while f_focal + 1 <= bound * f_min:
+			f_focal += 1
+			for coord in buckets.get(f_focal, ()):
+				heapq.heappush(focal, (open_f[coord] - costs[coord], counter, coord, costs[coord]))
+				counter += 1
+
+		h, _, coord, cost = heapq.heappop(focal)
+		if open_f.get(coord) != cost + h:
+			continue # expanded already, or reached more cheaply since this entry was pushed
+		f = open_f.pop(coord)
+		buckets[f].discard(coord)
+		if not buckets[f]:
+			del buckets[f]
+		num_expanded += 1
+		if coord == goal:
+			print("Found goal using focal search")
+			return visited, num_expanded
+
+		for direction in DIRS:
+			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+			if nextCoord not in states or cost + 1 >= costs.get(nextCoord, INF):
+				continue
+			old_f = open_f.get(nextCoord)
+			if old_f is not None:
+				buckets[old_f].discard(nextCoord)
+				if not buckets[old_f]:
+					del buckets[old_f]
+			visited[nextCoord] = coord
+			costs[nextCoord] = cost + 1
+			h = manhattan(nextCoord, goal)
+			open_f[nextCoord] = cost + 1 + h
+			buckets.setdefault(cost + 1 + h, set()).add(nextCoord)
+			if cost + 1 + h <= f_focal:
+				heapq.heappush(focal, (h, counter, nextCoord, cost + 1))
+				counter += 1
+
+	print("Goal unreachable using focal search")
+	return visited, num_expanded
+
+def frontier_reach(states, root, target, limit):
+	"""Breadth-first search from root that only keeps its last two layers (frontier search): in a maze every neighbor of a cell at
+	distance d is at distance d - 1, d or d + 1, so those layers are all it takes to never go back. Memory is the widest three layers in
+	a row rather than the whole region, and the search gives up if they ever hold more than limit cells.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		root {tuple} -- where the search starts
+		target {tuple} -- the cell to look for
+		limit {int} -- most cells the search may hold at once
+
+	Returns:
+		bool, int -- True if target was reached, False if root's whole region was searched without reaching it, None if the search
+		gave up; and the number of cells expanded
+	"""
+	previous, layer, num_expanded = set(), {root}, 0
+	while layer:
+		if target in layer:
+			return True, num_expanded
+		num_expanded += len(layer)
+		following = set()
+		for coord in layer:
+			for direction in DIRS:
+				nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+				if nextCoord in states and nextCoord not in layer and nextCoord not in previous:
+					following.add(nextCoord)
+		if len(previous) + len(layer) + len(following) > limit:
+			return None, num_expanded
+		previous, layer = layer, following
+	return False, num_expanded
+
+def ida_star(states, start, goal, table_size = IDA_TABLE_SIZE, observer = None):
+	"""Iterative deepening A*: depth-first searches bounded by f = g + h, with the bound raised to the smallest f that went past it each time.
+	Memory is the current path plus a transposition table of at most table_size cells, which holds the lowest g each cell has been reached
+	with in the current iteration so other, longer routes to it can be cut. Once the table is full, a new cell replaces the one with the
+	largest g if its own g is smaller, since a cell close to the start cuts off more of the search. A cell that is not in the table is
+	searched again by every route that reaches it, which costs time but never correctness.
+	Reachability is settled first by a frontier_reach from the goal, and then from the start, each within table_size cells, so an
+	unreachable goal is answered in time linear in the region searched instead of by iterations that grow the bound one step at a time.
+	Only when neither search fits (both regions have layers too wide for the table) is it left to the iterations, and then a table too
+	small for the maze can make them take exponential time. Since a shortest path visits no cell twice, its cost (and with it the f of
+	every node on it) is below the number of open cells, and the search stops once the bound passes that.
+	An expansion whose f is within the previous bound was necessarily made in the previous iteration too, and is counted as a re-expansion.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		table_size {int} -- most cells the transposition table can hold
+		observer {SearchObserver} -- instrumentation hooks (re-expansions are reported as reopens), or None
+
+	Returns:
+		dict, int -- a visited dict holding just the path, and the number of nodes expanded over all iterations
+	"""
+	if observer is not None:
+		observer.phase('search')
+	if start == goal:
+		print("Found goal using IDA* after 1 iterations (0 re-expansions)")
+		if observer is not None:
+			observer.finish(True)
+		return {start: start}, 1
+	num_expanded = 0
+	for root, other in ((goal, start), (start, goal)): # settle an unreachable goal up front
+		reached, probed = frontier_reach(states, root, other, table_size)
+		num_expanded += probed
+		if reached is not None:
+			break
+	if reached is False:
+		print("Goal unreachable using IDA*")
+		if observer is not None:
+			observer.finish(False)
+		return {start: start}, num_expanded
+
+	bound, prev_bound = manhattan(start, goal), -1
+	reexpanded, iterations = 0, 0
+	while bound < len(states):
+		iterations += 1
+		table, by_cost, next_bound = {start: 0}, [(0, start)], INF # by_cost is a max-heap of (-g, cell) over the table, stale pairs are skipped
+		path, on_path, depths, moves = [start], {start}, [0], [iter(DIRS)]
+		num_expanded += 1
+		if observer is not None:
+			observer.expand(start, 0)
+		if iterations > 1:
+			reexpanded += 1
+		while moves:
+			direction = next(moves[-1], None)
+			if direction is None: # every move from here is done, back up
+				moves.pop()
+				depths.pop()
+				on_path.discard(path.pop())
+				continue
+
+			coord = path[-1]
+			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+			if nextCoord not in states or nextCoord in on_path:
+				continue
+			cost = depths[-1] + 1
+			f = cost + manhattan(nextCoord, goal)
+			if f > bound:
+				next_bound = min(next_bound, f)
+				continue
+			known = table.get(nextCoord)
+			if known is not None and known <= cost:
+				continue # already searched from here this iteration, with a path at least as short
+			if known is None and len(table) >= table_size:
+				while table.get(by_cost[0][1]) != -by_cost[0][0]:
+					heapq.heappop(by_cost)
+				if -by_cost[0][0] > cost: # replace the cell with the largest g
+					del table[heapq.heappop(by_cost)[1]]
+			if known is not None or len(table) < table_size:
+				table[nextCoord] = cost
+				heapq.heappush(by_cost, (-cost, nextCoord))
+				if len(by_cost) > 2 * table_size: # too many stale pairs
+					by_cost = [(-g, cell) for cell, g in table.items()]
+					heapq.heapify(by_cost)
+
+			num_expanded += 1
+			if f <= prev_bound:
+				reexpanded += 1
+				if observer is not None:
+					observer.reopen(nextCoord)
+			if observer is not None:
+				observer.expand(nextCoord, len(path))
+			if nextCoord == goal:
+				print("Found goal using IDA* after {0} iterations ({1} re-expansions)".format(iterations, reexpanded))
+				if observer is not None:
+					observer.finish(True)
+				return path_to_visited(path + [goal]), num_expanded
+			path.append(nextCoord)
+			on_path.add(nextCoord)
+			depths.append(cost)
+			moves.append(iter(DIRS))
+
+		prev_bound, bound = bound, next_bound
+
+	print("Goal unreachable using IDA*")
+	if observer is not None:
+		observer.finish(False)
+	return {start: start}, num_expanded
+
+def sma_star(states, start, goal, max_nodes = SMA_MAX_NODES, observer = None):
+	"""Simplified memory-bounded A*: A* that never keeps more than max_nodes search nodes.
+	When memory is full the worst leaf (highest f, shallowest on ties) is forgotten and its f is remembered by its parent,
+	which goes back on the frontier with the lowest f among its forgotten children, and regenerates that child (a re-expansion)
+	once nothing better is left. Successors take f = max(parent's f, g + h) so f never decreases along a path, and a node whose
+	path already fills memory is treated as a dead end.
+	The path is optimal as long as max_nodes can hold it, and the search gives up when no path fits.
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		max_nodes {int} -- hard cap on the number of nodes kept
+		observer {SearchObserver} -- instrumentation hooks, or None
+
+	Returns:
+		dict, int -- a visited dict holding just the path, and the number of nodes expanded
+	"""
+	# a node is [coord, g, parent id, coords of the children in memory (None until expanded), {forgotten child: its backed-up f}]
+	nodes, by_coord = {0: [start, 0, None, None, {}]}, {start: 0}
+	open_keys = {} # the key is a node id on the frontier, the value is the f it is waiting with
+	best, worst = [], [] # best pops the lowest (f, -g), worst pops the highest (f, -g)
+	next_id, num_expanded, reexpanded, forgotten = 1, 0, 0, 0
+	if observer is not None:
+		observer.phase('search')
+		observer.push(start, start)
+
+	def queue(node_id, f):
+		open_keys[node_id] = f
+		heapq.heappush(best, (f, -nodes[node_id][1], node_id))
+		if not nodes[node_id][3]:
+			heapq.heappush(worst, (-f, nodes[node_id][1], node_id))
+
+	def forget(node_id):
+		nonlocal forgotten
+		while node_id is not None:
+			coord, _, parent_id, _, _ = nodes.pop(node_id)
+			f = open_keys.pop(node_id, INF) # a leaf off the frontier is a dead end
+			forgotten += 1
+			if by_coord.get(coord) == node_id:
+				del by_coord[coord]
+			if parent_id is None:
+				return
+			parent = nodes[parent_id]
+			parent[3].discard(coord)
+			parent[4][coord] = f
+			key = min(parent[4].values())
+			node_id = None
+			if key < INF: # back on the frontier with the best of what it lost
+				queue(parent_id, key)
+				if observer is not None:
+					observer.reopen(parent[0])
+			elif not parent[3]:
+				node_id = parent_id # nothing below it leads anywhere
+
+	queue(0, manhattan(start, goal))
+	while best:
+		f, _, node_id = heapq.heappop(best)
+		if open_keys.get(node_id) != f:
+			continue # stale entry
+		if f >= INF:
+			break
+		del open_keys[node_id]
+		node = nodes[node_id]
+		coord, cost = node[0], node[1]
+		num_expanded += 1
+		if observer is not None:
+			observer.expand(coord, len(open_keys))
+		if coord == goal:
+			path = []
+			while node_id is not None:
+				path.append(nodes[node_id][0])
+				node_id = nodes[node_id][2]
+			print("Found goal using SMA* ({0} re-expansions, {1} nodes forgotten)".format(reexpanded, forgotten))
+			if observer is not None:
+				observer.finish(True)
+			return path_to_visited(path[::-1]), num_expanded
+
+		if node[3] is None: # first expansion, every successor
+			node[3] = set()
+			successors = []
+			for direction in DIRS:
+				nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+				if nextCoord in states and (cost + 2 < max_nodes or (cost + 2 == max_nodes and nextCoord == goal)): # a longer path could never fit in memory
+					successors.append((nextCoord, max(f, cost + 1 + manhattan(nextCoord, goal))))
+		else: # regenerate the forgotten child(ren) it was waiting on
+			reexpanded += 1
+			successors = [(child, child_f) for child, child_f in node[4].items() if child_f == f]
+			for child, _ in successors:
+				del node[4][child]
+		for nextCoord, child_f in successors:
+			other = by_coord.get(nextCoord)
+			if other is not None and nodes[other][1] <= cost + 1:
+				continue # in memory already by a path at least as short (this covers every ancestor too)
+			nodes[next_id] = [nextCoord, cost + 1, node_id, None, {}]
+			by_coord[nextCoord] = next_id
+			node[3].add(nextCoord)
+			queue(next_id, child_f)
+			if observer is not None:
+				observer.push(nextCoord, coord)
+			next_id += 1
+
+		key = min(node[4].values(), default = INF)
+		if key < INF:
+			queue(node_id, key) # still has forgotten children to come back for
+		elif not node[3]:
+			forget(node_id) # a dead end
+		while len(nodes) > max_nodes and worst:
+			neg_f, _, leaf = heapq.heappop(worst)
+			if open_keys.get(leaf) == -neg_f and not nodes[leaf][3]:
+				forget(leaf)
+		if len(best) + len(worst) > 4 * max_nodes: # drop the stale entries, so the heaps stay within the memory cap too
+			best = [entry for entry in best if open_keys.get(entry[2]) == entry[0]]
+			worst = [entry for entry in worst if open_keys.get(entry[2]) == -entry[0] and not nodes[entry[2]][3]]
+			heapq.heapify(best)
+			heapq.heapify(worst)
+
+	print("Goal unreachable using SMA*")
+	if observer is not None:
+		observer.finish(False)
+	return {start: start}, num_expanded
+
+def join_visited(forward, backward, f_node, b_node):
+	"""Stitches the two halves of a bidirectional search into one visited dict that visited_to_path understands.
+
+	Arguments:
+		forward {dict} -- visited dict of the search from the start
+		backward {dict} -- visited dict of the search from the goal
+		f_node {tuple} -- where the searches met, on the forward side
+		b_node {tuple} -- where the searches met, on the backward side (same as f_node or next to it)
+
+	Returns:
+		dict -- forward, plus the backward chain from b_node to the goal flipped to point toward the start
+	"""
+	visited = dict(forward)
+	if b_node != f_node:
+		visited[b_node] = f_node
+	curr = b_node
+	while backward[curr] != curr:
+		nextCoord = backward[curr]
+		visited[nextCoord] = curr
+		curr = nextCoord
+	return visited
+
+def bidirectional_bfs(states, start, goal):
+	"""
+	Breadth first search from both ends at once, always growing whichever frontier is smaller by one full layer
+	Once a layer touches the other side, the best connection found in that layer is the shortest path
+	"""
+	forward, backward = {start: start}, {goal: goal}
+	dist_f, dist_b = {start: 0}, {goal: 0}
+	front_f, front_b = [start], [goal]
+	num_expanded = 0
+	if start == goal:
+		return forward, 1
+
+	while front_f and front_b:
+		is_forward = len(front_f) <= len(front_b)
+		if is_forward:
+			layer, parents, dist, other_dist = front_f, forward, dist_f, dist_b
+		else:
+			layer, parents, dist, other_dist = front_b, backward, dist_b, dist_f
+
+		best, meet, next_layer = INF, None, []
+		for coord in layer:
+			num_expanded += 1
+			for direction in DIRS:
+				nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+				if nextCoord not in states:
+					continue
+				if nextCoord in other_dist and dist[coord] + 1 + other_dist[nextCoord] < best:
+					best, meet = dist[coord] + 1 + other_dist[nextCoord], (coord, nextCoord)
+				if nextCoord not in parents:
+					parents[nextCoord] = coord
+					dist[nextCoord] = dist[coord] + 1
+					next_layer.append(nextCoord)
+
+		if meet is not None:
+			print("Found goal using bidirectional BFS")
+			f_node, b_node = meet if is_forward else (meet[1], meet[0])
+			return join_visited(forward, backward, f_node, b_node), num_expanded
+
+		if is_forward:
+			front_f = next_layer
+		else:
+			front_b = next_layer
+
+	print("Goal unreachable using bidirectional BFS")
+	return forward, num_expanded
+
+def bidirectional_astar(states, start, goal):
+	"""
+	A* from both ends at once, expanding the side with the smaller frontier
+	Both sides use the averaged potential p(v) = (manhattan(v, goal) - manhattan(v, start)) / 2 (forward adds it, backward subtracts it),
+	which keeps both searches consistent and lets them stop as soon as top_forward + top_backward >= 2 * (best meeting cost)
+	Keys are doubled so everything stays an integer
+	"""
+	frontier_f, frontier_b = PriorityFrontier(), PriorityFrontier()
+	forward, backward = {start: start}, {goal: goal}
+	g_f, g_b = {start: 0}, {goal: 0}
+	potential = lambda coord: manhattan(coord, goal) - manhattan(coord, start)
+	frontier_f.push(start, potential(start))
+	frontier_b.push(goal, -potential(goal))
+	mu, meet = (0, start) if start == goal else (INF, None)
+	num_expanded = 0
+
+	while frontier_f and frontier_b:
+		if frontier_f.peek() + frontier_b.peek() >= 2 * mu:
+			break
+		if len(frontier_f) <= len(frontier_b):
+			frontier, parents, g, other_g, sign = frontier_f, forward, g_f, g_b, 1
+		else:
+			frontier, parents, g, other_g, sign = frontier_b, backward, g_b, g_f, -1
+
+		coord, _ = frontier.pop()
+		num_expanded += 1
+		for direction in DIRS:
+			nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
+			if nextCoord not in states:
+				continue
+			cost = g[coord] + 1
+			if cost < g.get(nextCoord, INF):
+				g[nextCoord] = cost
+				parents[nextCoord] = coord
+				frontier.push(nextCoord, 2 * cost + sign * potential(nextCoord))
+			if nextCoord in other_g and g[nextCoord] + other_g[nextCoord] < mu:
+				mu, meet = g[nextCoord] + other_g[nextCoord], nextCoord
+
+	if meet is None:
+		print("Goal unreachable using bidirectional A*")
+		return forward, num_expanded
+	print("Found goal using bidirectional A*")
+	return join_visited(forward, backward, meet, meet), num_expanded
+
+def jps(states, start, goal):
+	"""
+	Jump Point Search, adapted to the 4-connected grid
+	Among equal-cost paths only "horizontal first" ones are kept: a horizontal run may turn vertical anywhere,
+	but a vertical run may only turn horizontal where the cell diagonally behind it on that side is a wall (a forced neighbor)
+	Runs are scanned without touching the frontier, so only jump points get pushed and expanded
+	A state is (coord, direction it was reached from), since the allowed moves depend on it
+
+	Returns:
+		dict, int -- a visited dict holding just the final path (so print_sol still works), and the number of jump points expanded
+	"""
+	def jump_vertical(coord, dx):
+		x, y = coord
+		while True:
+			x += dx
+			if (x, y) not in states:
+				return None
+			if (x, y) == goal:
+				return (x, y)
+			for dy in (1, -1):
+				if (x, y + dy) in states and (x - dx, y + dy) not in states:
+					return (x, y)
+
+	def jump_horizontal(coord, dy):
+		x, y = coord
+		while True:
+			y += dy
+			if (x, y) not in states:
+				return None
+			if (x, y) == goal or jump_vertical((x, y), 1) or jump_vertical((x, y), -1):
+				return (x, y)
+
+	def successors(coord, direction):
+		x, y = coord
+		if direction is None:
+			moves = DIRS
+		elif direction[0] == 0: # reached horizontally, keep going or turn vertical
+			moves = [direction, (1, 0), (-1, 0)]
+		else: # reached vertically, keep going or take a forced horizontal turn
+			moves = [direction]
+			for dy in (1, -1):
+				if (x, y + dy) in states and (x - direction[0], y + dy) not in states:
+					moves.append((0, dy))
+		for move in moves:
+			if move[0] == 0:
+				point = jump_horizontal(coord, move[1])
+			else:
+				point = jump_vertical(coord, move[0])
+			if point is not None:
+				yield point, move
+
+	start_state = (start, None)
+	frontier, num_expanded = PriorityFrontier(), 0
+	costs, parents = {start_state: 0}, {start_state: start_state}
+	frontier.push(start_state, manhattan(start, goal))
+	while frontier:
+		state, _ = frontier.pop()
+		coord = state[0]
+		num_expanded += 1
+		if coord == goal:
+			print("Found goal using JPS")
+			points = [coord]
+			while parents[state] != state:
+				state = parents[state]
+				points.append(state[0])
+			visited = {start: start}
+			for a, b in zip(reversed(points), reversed(points[:-1])): # fill in the cells between consecutive jump points
+				dx, dy = (b[0] > a[0]) - (b[0] < a[0]), (b[1] > a[1]) - (b[1] < a[1])
+				curr = a
+				while curr != b:
+					nextCoord = (curr[0] + dx, curr[1] + dy)
+					visited[nextCoord] = curr
+					curr = nextCoord
+			return visited, num_expanded
+
+		cost = costs[state]
+		for point, move in successors(coord, state[1]):
+			next_state = (point, move)
+			next_cost = cost + manhattan(coord, point)
+			if next_cost < costs.get(next_state, INF):
+				if frontier.push(next_state, next_cost + manhattan(point, goal)):
+					costs[next_state] = next_cost
+					parents[next_state] = state
+
+	print("Goal unreachable using JPS")
+	return {start: start}, num_expanded
 
 def bfs2(states, start, goal):
-	q, num_expanded = queue.Queue(), 0
+	q, num_expanded = deque(), 0
 	visited = {} #the key is a coordinate, the value is the previous coordinate, this helps in constructing the final path
-	q.put((start, ()))
-	visited[start] = (start, ())
+	q.append((start, ()))
+	visited[(start, ())] = (start, ()) # the start state is its own parent, which is where path reconstruction stops
 	while q:
-		coord, dots_eaten = q.get()
+		coord, dots_eaten = q.popleft()
 		num_expanded += 1
 		if coord in goal and coord not in dots_eaten:
 			old_key = (coord, dots_eaten)
@@ -118,29 +801,37 @@ def bfs2(states, start, goal):
 				key = (nextCoord, dots_eaten)
 				nextNode = visited.get(key)
 				if nextNode is None:
-					q.put(key)
+					q.append(key)
 					visited[key] = (coord, dots_eaten)
 
+	print("Some dots are unreachable")
+	return visited, num_expanded, None
+
 """
 TODO:
 1. Trace path with numbers instead of dots
 2. Come up with a more clever heuristic function than manhattan distance
 3. Come up with a more clever dot selection strategy than "pick whichever dot is closest to the current node" 
 """
-def astar_multiple(states, start, goals):
+def astar_multiple(states, start, goals, distances = None):
 	"""
 	Implements A* search on a maze with multiple goals 
 	Currently using the naive strategy of "next dot = closest dot to current point"
+	"Closest" and the A* heuristic both use true maze distances from a DotDistances table
 
 	Arguments: 
 		states {set of tuples} -- represents the "empty" states in the maze
 		start {tuple} -- the starting point 
 		goals {list of tuples} -- list of dots that need to be reached
+		distances {DotDistances} -- precomputed distance table for these goals, built here if not given
 
 	Returns:
 		list of tuples, int -- returns the path between the dots and the number of nodes expanded
 	"""
 	goals = copy.deepcopy(goals)
+	if distances is None:
+		distances = DotDistances.from_states(states, goals)
+	grid = distances.grid
 	num_expanded = 0
 	coord = start
 	path = deque()
@@ -148,17 +839,17 @@ def astar_multiple(states, start, goals):
 	path.appendleft(start)
 
 	while goals: 
-		nodes, path_to_dot = [], {}
-		goal = get_closest_dot(goals, coord) # Current dot selection strategy
+		frontier, path_to_dot, costs = PriorityFrontier(), {}, {}
+		goal = distances.nearest_dot(coord, goals) # Current dot selection strategy
 		goals.remove(goal)
 		reached.append(goal)
-		start_node = (coord, manhattan(coord, goal), 0)
-		nodes.append(start_node)
+		to_goal = distances.cell_to_dot[distances.index[goal]]
+		frontier.push(coord, int(to_goal[grid.to_id(coord)]))
 		path_to_dot[coord] = coord
-		while nodes:
-			min_node = min(nodes, key = lambda x:x[1])
-			coord, _, cost = min_node
-			nodes.remove(min_node)
+		costs[coord] = 0
+		while frontier:
+			coord, _ = frontier.pop()
+			cost = costs[coord]
 			num_expanded += 1
 			if coord == goal:
 				print("Found goal at {0}".format(goal))
@@ -168,7 +859,373 @@ def astar_multiple(states, start, goals):
 			for direction in DIRS:
 				nextCoord = (coord[0] + direction[0], coord[1] + direction[1])
 				if nextCoord in states and nextCoord not in path_to_dot:
-					nodes.append((nextCoord, cost + manhattan(nextCoord, goal), cost + 1))
+					frontier.push(nextCoord, cost + int(to_goal[grid.to_id(nextCoord)]))
 					path_to_dot[nextCoord] = coord
+					costs[nextCoord] = cost + 1
 				
-	return path, reached, num_expanded
\ No newline at end of file
+	return path, reached, num_expanded
+
+def dot_tour_heuristic(distances, start):
+	"""Builds the heuristic shared by the dot-to-dot searches: (distance to the closest remaining dot) + (MST weight of the remaining dots).
+	It never overestimates and is consistent.
+
+	Arguments:
+		distances {DotDistances} -- precomputed distance table for the dots
+		start {tuple} -- the starting point
+
+	Returns:
+		function, list of lists -- heuristic(pos, mask), and the edge rows: rows[pos][i] is the distance from pos to dot i (pos == number of dots is the start)
+	"""
+	k = len(distances.dots)
+	full = (1 << k) - 1
+	rows = distances.dot_to_dot.tolist() + [distances.cell_to_dot[:, distances.grid.to_id(start)].tolist()]
+
+	def heuristic(pos, mask):
+		remaining = full & ~mask
+		if not remaining:
+			return 0
+		row = rows[pos]
+		nearest = min(row[i] for i in range(k) if remaining >> i & 1)
+		return nearest + distances.mst_weight(remaining)
+	return heuristic, rows
+
+def tour_to_path(distances, start, order):
+	"""
+	Expands a dot order into the full cell path (including the start), following shortest paths between consecutive dots
+	"""
+	path = deque([start])
+	coord = start
+	for dot in order:
+		path.extend(distances.path_to(coord, dot))
+		coord = dot
+	return path
+
+def astar_mst(states, start, goals, distances = None):
+	"""
+	Optimal A* search on a maze with multiple goals
+	A state is (position, eaten dots) packed into one int: position << len(goals) | eaten_bitmask,
+	where position is the index of the last dot eaten (len(goals) means still at the start)
+	Moves jump straight from dot to dot along precomputed shortest paths, which loses nothing: 
+	eating a dot on the way to another one is the same as visiting it first
+	The heuristic is (distance to the closest remaining dot) + (MST weight of the remaining dots), which is consistent
+
+	Arguments: 
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point 
+		goals {list of tuples} -- list of dots that need to be reached
+		distances {DotDistances} -- precomputed distance table for these goals, built here if not given
+
+	Returns:
+		deque of tuples, list of tuples, int -- the full path (including the start), the order the dots were eaten in, and the number of nodes expanded
+	"""
+	if distances is None:
+		distances = DotDistances.from_states(states, goals)
+	k = len(distances.dots)
+	full = (1 << k) - 1
+	heuristic, rows = dot_tour_heuristic(distances, start)
+
+	start_state = k << k
+	frontier, num_expanded = PriorityFrontier(), 0
+	costs, parents = {start_state: 0}, {start_state: start_state}
+	frontier.push(start_state, (heuristic(k, 0), 0)) # ties go to the deeper node
+	end_state = None
+	while frontier:
+		state, _ = frontier.pop()
+		num_expanded += 1
+		pos, mask = state >> k, state & full
+		if mask == full:
+			end_state = state
+			break
+
+		cost = costs[state]
+		row = rows[pos]
+		for i in range(k):
+			if mask >> i & 1 or row[i] >= INF:
+				continue
+			next_mask = mask | 1 << i
+			next_state = i << k | next_mask
+			next_cost = cost + row[i]
+			if next_cost < costs.get(next_state, INF):
+				if frontier.push(next_state, (next_cost + heuristic(i, next_mask), -next_cost)):
+					costs[next_state] = next_cost
+					parents[next_state] = state
+
+	if end_state is None:
+		print("Some dots are unreachable")
+		return deque([start]), [], num_expanded
+
+	order = []
+	state = end_state
+	while state != start_state:
+		order.append(distances.dots[state >> k])
+		state = parents[state]
+	order.reverse()
+	print("Found all dots using A* (MST heuristic)")
+	return tour_to_path(distances, start, order), order, num_expanded
+
+def astar_anytime(states, start, goals, distances = None, time_limit = None, max_expansions = None, weight = 2.0, callback = None):
+	"""
+	Anytime multi-dot search for when an answer is needed within a fixed time or effort
+	Starts from the "closest dot next" tour, which is available immediately, then runs anytime weighted A*
+	over the same (position, eaten dots) states as astar_mst: nodes are ordered by g + weight * h, every complete tour found 
+	that beats the best so far replaces it, and nodes with g + h >= best cost are pruned
+	The lower bound is the smallest g + h left on the frontier; once the frontier is empty the best tour is optimal
+
+	Arguments: 
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point 
+		goals {list of tuples} -- list of dots that need to be reached
+		distances {DotDistances} -- precomputed distance table for these goals, built here if not given
+		time_limit {float} -- seconds to keep improving for, None for no limit
+		max_expansions {int} -- expansion budget, None for no limit
+		weight {float} -- heuristic weight, higher finds tours sooner but improves them more slowly
+		callback {function} -- called as callback(cost, order, lower_bound) with the first tour, every better one, and once at the end
+
+	Returns:
+		deque of tuples, list of tuples, int -- the best full path (including the start), its dot order, and the number of nodes expanded
+	"""
+	deadline = None if time_limit is None else time.perf_counter() + time_limit
+	if distances is None:
+		distances = DotDistances.from_states(states, goals)
+	k = len(distances.dots)
+	full = (1 << k) - 1
+	heuristic, rows = dot_tour_heuristic(distances, start)
+
+	best_order, best_cost, pos, mask = [], 0, k, 0 # greedy tour first, so there is always an answer
+	while mask != full:
+		row = rows[pos]
+		i = min((i for i in range(k) if not mask >> i & 1), key = lambda i: row[i])
+		best_cost += row[i]
+		best_order.append(distances.dots[i])
+		pos, mask = i, mask | 1 << i
+	lower_bound = heuristic(k, 0)
+	if callback:
+		callback(best_cost, list(best_order), lower_bound)
+
+	start_state = k << k
+	frontier, num_expanded = PriorityFrontier(), 0
+	costs, parents = {start_state: 0}, {start_state: start_state}
+	frontier.push(start_state, (weight * heuristic(k, 0), 0))
+	while frontier:
+		if max_expansions is not None and num_expanded >= max_expansions:
+			break
+		if deadline is not None and time.perf_counter() > deadline:
+			break
+		state, _ = frontier.pop()
+		cost = costs[state]
+		pos, mask = state >> k, state & full
+		if cost + heuristic(pos, mask) >= best_cost:
+			continue # can't beat the best tour, pruned
+		num_expanded += 1
+
+		row = rows[pos]
+		for i in range(k):
+			if mask >> i & 1 or row[i] >= INF:
+				continue
+			next_mask = mask | 1 << i
+			next_state = i << k | next_mask
+			next_cost = cost + row[i]
+			h = heuristic(i, next_mask)
+			if next_cost + h >= best_cost or next_cost >= costs.get(next_state, INF):
+				continue
+			costs[next_state] = next_cost
+			parents[next_state] = state
+			if next_mask == full: # a better complete tour
+				best_cost, best_order = next_cost, []
+				while next_state != start_state:
+					best_order.append(distances.dots[next_state >> k])
+					next_state = parents[next_state]
+				best_order.reverse()
+				if callback:
+					callback(best_cost, list(best_order), min(lower_bound_of(frontier, costs, heuristic, k, full), best_cost))
+				continue
+			frontier.reopen(next_state) # weighted A* can find a cheaper way to a closed state
+			frontier.push(next_state, (next_cost + weight * h, -next_cost))
+
+	lower_bound = min(lower_bound_of(frontier, costs, heuristic, k, full), best_cost)
+	if callback:
+		callback(best_cost, list(best_order), lower_bound)
+	print("Best tour {0}, lower bound {1}".format(best_cost, lower_bound))
+	return tour_to_path(distances, start, best_order), best_order, num_expanded
+
+def lower_bound_of(frontier, costs, heuristic, k, full):
+	"""
+	Smallest g + h among the open states of an anytime search, INF if there are none
+	"""
+	bound = INF
+	for state in frontier:
+		bound = min(bound, costs[state] + heuristic(state >> k, state & full))
+	return bound
+
+"""
+Grid versions of the searches above
+These run on a grid.Grid (integer cell ids, flat passability mask) instead of a set of tuples, 
+and store parents in a flat int array instead of the visited dict
+They expand nodes in the same order as the tuple versions, so path costs and expansion counts match
+Use grid.parents_to_path(parents, goal) in place of visited_to_path
+dfs_grid, bfs_grid and greedy_grid take packed = True to store a grid.PackedParents (a visited bit and a 2-bit direction per cell) instead
+"""
+def dfs_grid(grid, start, goal, packed = False):
+	stack, num_expanded = [start], 0
+	passable, offsets = grid.passable, grid.offsets
+	parents = grid.new_packed_parents() if packed else grid.new_parents()
+	parents[start] = start
+
+	while stack:
+		cell = stack.pop()
+		num_expanded += 1
+		if cell == goal:
+			print("Found goal using DFS")
+			return parents, num_expanded
+
+		for offset in offsets:
+			n = cell + offset
+			if passable[n] and parents[n] == -1:
+				stack.append(n)
+				parents[n] = cell
+	return parents, num_expanded
+
+def bfs_engine(grid, sources, goal = UNREACHABLE, packed = False):
+	"""
+	Single-threaded breadth first search over cell ids, the core that the grid BFS searches share
+	Stops as soon as the goal is expanded, or when the frontier runs out
+
+	Arguments: 
+		grid {Grid} -- the compact maze
+		sources {list of ints} -- cell ids the search starts from (more than one gives a multi-source BFS)
+		goal {int} -- cell id to stop at, leave as UNREACHABLE to flood the whole reachable region
+		packed {bool} -- keep the parents in a grid.PackedParents (3 bits per cell) instead of an int array
+
+	Returns:
+		array, int, int -- the parent array, the number of nodes expanded, and the goal (or UNREACHABLE if it was never reached)
+	"""
+	q, num_expanded = deque(), 0
+	passable, offsets = grid.passable, grid.offsets
+	parents = grid.new_packed_parents() if packed else grid.new_parents()
+	for source in sources:
+		q.append(source)
+		parents[source] = source
+
+	while q:
+		cell = q.popleft()
+		num_expanded += 1
+		if cell == goal:
+			return parents, num_expanded, goal
+
+		for offset in offsets:
+			n = cell + offset
+			if passable[n] and parents[n] == -1:
+				q.append(n)
+				parents[n] = cell
+	return parents, num_expanded, UNREACHABLE
+
+def bfs_grid(grid, start, goal, packed = False):
+	parents, num_expanded, found = bfs_engine(grid, [start], goal, packed)
+	if found == UNREACHABLE:
+		print("Goal unreachable using BFS")
+	else:
+		print("Found goal using BFS")
+	return parents, num_expanded
+
+def greedy_grid(grid, start, goal, packed = False):
+	frontier, num_expanded = PriorityFrontier(), 0
+	passable, offsets = grid.passable, grid.offsets
+	parents = grid.new_packed_parents() if packed else grid.new_parents()
+	parents[start] = start
+	frontier.push(start, grid.manhattan(start, goal))
+
+	while frontier:
+		cell, _ = frontier.pop()
+		num_expanded += 1
+		if cell == goal:
+			print("Found goal using Greedy BFS")
+			return parents, num_expanded
+
+		for offset in offsets:
+			n = cell + offset
+			if passable[n] and parents[n] == -1:
+				frontier.push(n, grid.manhattan(n, goal))
+				parents[n] = cell
+	return parents, num_expanded
+
+def astar_single_grid(grid, start, goal):
+	frontier, num_expanded = PriorityFrontier(), 0
+	passable, offsets = grid.passable, grid.offsets
+	parents, costs = grid.new_parents(), grid.new_parents()
+	parents[start] = start
+	costs[start] = 0
+	frontier.push(start, grid.manhattan(start, goal))
+
+	while frontier:
+		cell, h = frontier.pop()
+		cost = costs[cell]
+		num_expanded += 1
+		if cell == goal:
+			print("Found goal using A* (single goal)")
+			return parents, num_expanded
+
+		for offset in offsets:
+			n = cell + offset
+			if passable[n]:
+				new_h = cost + grid.manhattan(n, goal)
+				if parents[n] == -1 or new_h < h:
+					if frontier.push(n, new_h):
+						parents[n] = cell
+						costs[n] = cost + 1
+	return parents, num_expanded
+
+def astar_multiple_grid(grid, start, goals, distances = None):
+	"""
+	Grid version of astar_multiple, using the same "next dot = closest dot to current point" strategy
+
+	Arguments: 
+		grid {Grid} -- the compact maze
+		start {int} -- cell id of the starting point 
+		goals {list of ints} -- cell ids of the dots that need to be reached
+		distances {DotDistances} -- precomputed distance table for these goals, built here if not given
+
+	Returns:
+		deque of tuples, deque of tuples, int -- the path between the dots and the order the dots were reached in (as (x, y) coordinates), and the number of nodes expanded
+	"""
+	goals = list(goals)
+	if distances is None:
+		distances = DotDistances(grid, [grid.to_coord(g) for g in goals])
+	num_expanded = 0
+	cell = start
+	passable, offsets = grid.passable, grid.offsets
+	parents, costs = grid.new_parents(), grid.new_parents()
+	path = deque()
+	reached = deque()
+	path.appendleft(grid.to_coord(start))
+
+	while goals:
+		rows = [distances.cell_index[g] for g in goals]
+		goal = goals[int(distances.cell_to_dot[rows, cell].argmin())] # Current dot selection strategy
+		goals.remove(goal)
+		reached.append(grid.to_coord(goal))
+		to_goal = distances.cell_to_dot[distances.cell_index[goal]]
+		frontier, touched = PriorityFrontier(), [cell]
+		frontier.push(cell, int(to_goal[cell]))
+		parents[cell] = cell
+		costs[cell] = 0
+		while frontier:
+			cell, _ = frontier.pop()
+			cost = costs[cell]
+			num_expanded += 1
+			if cell == goal:
+				print("Found goal at {0}".format(grid.to_coord(goal)))
+				path.extend(reversed(grid.parents_to_path(parents, goal)))
+				break
+
+			for offset in offsets:
+				n = cell + offset
+				if passable[n] and parents[n] == -1:
+					frontier.push(n, cost + int(to_goal[n]))
+					parents[n] = cell
+					costs[n] = cost + 1
+					touched.append(n)
+
+		for t in touched: # reset only what this leg wrote instead of reallocating the whole array
+			parents[t] = -1
+
+	return path, reached, num_expanded
@@ -1,22 +1,30 @@
 # Done
 from utils import parse_file, visited_to_path, visited_to_path2, print_sol, print_sol_multiple
-from maze_search import dfs, bfs, bfs2, greedy, astar_single, astar_multiple
-from ec import get_distances, astar_ec, astar_ec_anim
+from maze_search import dfs, bfs, bfs2, greedy, astar_single, astar_multiple, bidirectional_bfs, bidirectional_astar, jps, weighted_astar, dynamic_astar, focal_astar, ida_star, sma_star
+from corridor import CorridorGraph, corridor_bfs, corridor_astar
+from ec import get_distances, astar_ec, astar_ec_anim, astar_ec_frames
 import sys
 from collections import deque
-from maze_graphics import draw_sol
+from grid import Grid
+from distance_cache import load_distances
+import batch
 
 FILE_NAMES_1 = ['mediumMaze', 'bigMaze', 'openMaze'];
 FILE_NAMES_2 = ['tinySearch', 'smallSearch', 'mediumSearch']
-SEARCHES_1 = [dfs, bfs, greedy, astar_single]
+SEARCHES_1 = [dfs, bfs, greedy, astar_single, bidirectional_bfs, bidirectional_astar, jps, weighted_astar, dynamic_astar, focal_astar, ida_star, sma_star, corridor_bfs, corridor_astar]
 
 def part1_1():
 	for file_name in FILE_NAMES_1:
 		input_path = 'mp1.1/inputs/' + file_name + '.txt'
 		print("Now searching: {0}.txt".format(file_name))
 		maze, states, pacman, dots = parse_file(input_path)
+		graph = CorridorGraph(states, [pacman, dots[0]]) # contracted once, shared by the corridor searches
+		print("Corridor graph: {nodes} nodes and {corridors} corridors from {cells} open cells".format(**graph.stats()))
 		for search in SEARCHES_1:
-			visited, num_nodes_expanded = search(states, pacman, dots[0])
+			if search in (corridor_bfs, corridor_astar):
+				visited, num_nodes_expanded = search(states, pacman, dots[0], graph)
+			else:
+				visited, num_nodes_expanded = search(states, pacman, dots[0])
 			sol = visited_to_path(visited, dots[0])
 			output_path = 'mp1.1/outputs/' + file_name + '_sol_' + search.__name__ + '.txt'
 			print_sol(output_path, maze, sol, num_nodes_expanded)
@@ -26,7 +34,7 @@ def part1_2():
 		input_path = 'mp1.2/inputs/' + file_name + '.txt'
 		maze, states, pacman, dots = parse_file(input_path)
 		print("Now searching: {0}.txt".format(file_name))
-		num_nodes_expanded, sol, order = astar_ec(states, pacman, dots)
+		num_nodes_expanded, sol, order = astar_ec(states, pacman, dots, load_distances(Grid(maze), dots))
 		output_path = 'mp1.2/outputs/' + file_name + '_sol_astar_multiple.txt'
 		print_sol_multiple(output_path, maze, sol, order, num_nodes_expanded)
 
@@ -34,9 +42,10 @@ def test():
 	input_path = 'mp1_ec/inputs/' + 'bigDots' + '.txt'
 	maze, states, pacman, dots = parse_file(input_path)
 	print("Now searching: {0}.txt".format('bigDots'))
-	results = get_distances(states, dots)
-	for a in results:
-		print(a, results[a])
+	grid = Grid(maze)
+	field, nearest = get_distances(states, dots, grid)
+	for a in states:
+		print(a, field[grid.to_id(a)], dots[nearest[grid.to_id(a)]])
 	#visited, num_nodes_expanded, end = bfs2(states, pacman, dots)
 	#sol = visited_to_path2(visited, end)
 	#output_path = 'mp1.2/outputs/' + 'bigDots' + '_sol_astar_multiple.txt'
@@ -48,12 +57,21 @@ def part1_ec():
 	#input_path = 'mp1.2/inputs/' + 'mediumSearch' + '.txt'
 
 	maze, states, pacman, dots = parse_file(input_path)
-	num_expanded, path, order, win = astar_ec_anim(states, pacman, dots, maze)
+	num_expanded, path, order, win = astar_ec_anim(states, pacman, dots, maze, load_distances(Grid(maze), dots))
+	from maze_graphics import draw_sol # imported here so the other parts run without a display
 	draw_sol(win, path, order)
 	print(num_expanded, len(path))
+
+def part1_ec_frames(output_dir):
+	input_path = 'mp1_ec/inputs/bigDots.txt'
+	maze, states, pacman, dots = parse_file(input_path)
+	num_expanded, path, order, count = astar_ec_frames(states, pacman, dots, maze, output_dir, load_distances(Grid(maze), dots))
+	print("Wrote {0} frames to {1}".format(count, output_dir))
 	
 def print_usage():
 	print("To use:\npython part1.py [part1_1 | part1_2 | part1_ec]")
+	print("python part1.py batch <maze directory or glob> <output directory> [algorithm,algorithm,...]")
+	print("python part1.py part1_ec_frames <output directory>")
 
 if __name__ == "__main__":
 	if len(sys.argv) == 1: 
@@ -67,8 +85,14 @@ if __name__ == "__main__":
 			part1_2()
 		elif func == "part1_ec":
 			part1_ec()
+		elif func == "part1_ec_frames":
+			part1_ec_frames(sys.argv[i + 1])
+			break
 		elif func == "test":
 			test()
+		elif func == "batch":
+			batch.main(sys.argv[i + 1:]) # everything after "batch" is its arguments
+			break
 		else:
 			print("Option {0} is invalid".format(i))
 			print_usage()
\ No newline at end of file
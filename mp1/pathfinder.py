@@ -0,0 +1,249 @@
+from utils import LRUCache
+from grid import Grid
+from dot_distances import INF
+from collections import deque
+import numpy as np
+
+"""
+Reusable pathfinding for many queries on one fixed maze
+Every goal that is asked about gets a reverse breadth first search tree grown out from it, only as far as the queries so far
+have needed (Reverse Resumable A*, with a blind search since moves all cost 1). The tree keeps its frontier, so the next
+query to the same goal picks up where the last one stopped, and any cell the tree has reached gets its distance and its
+path to the goal without another search. Finished legs are kept in an LRU keyed by (from, to)
+"""
+
+MAX_TREES = 256 # reverse trees a Pathfinder keeps, each is one int32 per grid cell
+MAX_LEGS = 4096 # leg paths a Pathfinder keeps
+
+class ReverseTree:
+	"""
+	Breadth first search from one goal that can be stopped and resumed, a layer at a time (vectorized like dot_distances.bfs_distances)
+	dist holds the exact distance to the goal for every cell reached so far and INF for the rest
+	"""
+	def __init__(self, grid, passable, goal):
+		"""
+		Arguments:
+			grid {Grid} -- the compact maze
+			passable {numpy array} -- the grid's passable bytes as a bool array, shared by all the trees
+			goal {int} -- cell id the tree is rooted at
+		"""
+		self.grid = grid
+		self.passable = passable
+		self.offsets = np.array(grid.offsets, dtype=np.int64)
+		self.dist = np.full(grid.size, INF, dtype=np.int32)
+		self.dist[goal] = 0
+		self.frontier = np.array([goal], dtype=np.int64)
+		self.radius = 0 # every cell within this distance of the goal has been reached
+		self.expanded = 0
+
+	def done(self):
+		"""
+		Returns true once every cell the goal can reach has been reached
+		"""
+		return self.frontier.size == 0
+
+	def grow(self):
+		"""
+		Reaches the next layer of cells
+		"""
+		self.expanded += self.frontier.size
+		nbrs = (self.frontier[:, None] + self.offsets).ravel()
+		nbrs = np.unique(nbrs[self.passable[nbrs] & (self.dist[nbrs] == INF)])
+		self.radius += 1
+		self.dist[nbrs] = self.radius
+		self.frontier = nbrs
+
+	def reach(self, cell):
+		"""Grows the tree until it reaches a cell (or runs out of cells).
+
+		Arguments:
+			cell {int} -- cell id
+
+		Returns:
+			int -- the cell's distance to the goal, INF if unreachable
+		"""
+		dist = self.dist
+		while dist[cell] == INF and self.frontier.size:
+			self.grow()
+		return int(dist[cell])
+
+	def descend(self, cell):
+		"""Walks down the tree from a cell it has reached, like DotDistances.path_to.
+
+		Arguments:
+			cell {int} -- cell id to start from
+
+		Returns:
+			list of tuples -- the path, not including the cell but including the goal (empty if unreachable)
+		"""
+		dist, grid = self.dist, self.grid
+		d = int(dist[cell])
+		path = []
+		if d >= INF:
+			return path
+		while d > 0:
+			for offset in grid.offsets:
+				if dist[cell + offset] == d - 1:
+					cell += offset
+					break
+			d -= 1
+			path.append(grid.to_coord(cell))
+		return path
+
+class Pathfinder:
+	"""
+	Shortest paths between any two cells of one maze, sharing work across queries through the reverse trees and the leg cache
+	Moves are reversible, so a tree rooted at either end of a query can answer it, and a cached leg serves both directions
+	"""
+	def __init__(self, grid, max_trees = MAX_TREES, max_legs = MAX_LEGS):
+		"""
+		Arguments:
+			grid {Grid} -- the compact maze
+			max_trees {int} -- reverse trees kept (least recently used ones are dropped, and regrown if asked for again)
+			max_legs {int} -- leg paths kept
+		"""
+		self.grid = grid
+		self.passable = np.frombuffer(grid.passable, dtype=np.uint8).astype(bool)
+		self.trees = LRUCache(max_trees)
+		self.legs = LRUCache(max_legs) # the key is (a, b) with a < b, the value is the path from a to b, not including a
+		self.expanded = 0 # cells expanded by every tree so far, including dropped ones
+
+	@classmethod
+	def from_states(cls, states):
+		"""
+		Builds a pathfinder straight from utils.parse_file output
+		"""
+		return cls(Grid.from_states(states))
+
+	def tree(self, goal):
+		"""Returns the reverse tree rooted at a goal, starting a new one if there is none.
+
+		Arguments:
+			goal {tuple} -- (x, y) coordinate
+
+		Returns:
+			ReverseTree -- the goal's tree
+		"""
+		tree = self.trees.get(goal)
+		if tree is None:
+			tree = ReverseTree(self.grid, self.passable, self.grid.to_id(goal))
+			self.trees.put(goal, tree)
+		return tree
+
+	def grow(self, tree, cell):
+		"""
+		tree.reach(cell), keeping count of the cells expanded
+		"""
+		before = tree.expanded
+		d = tree.reach(cell)
+		self.expanded += tree.expanded - before
+		return d
+
+	def distance(self, start, goal):
+		"""Returns the maze distance between two cells.
+
+		Arguments:
+			start {tuple} -- (x, y) coordinate
+			goal {tuple} -- (x, y) coordinate
+
+		Returns:
+			int -- number of steps, INF if there is no path
+		"""
+		if goal not in self.trees.entries and start in self.trees.entries:
+			start, goal = goal, start
+		return self.grow(self.tree(goal), self.grid.to_id(start))
+
+	def path(self, start, goal):
+		"""Returns a shortest path between two cells, from the leg cache if it is there.
+
+		Arguments:
+			start {tuple} -- (x, y) coordinate
+			goal {tuple} -- (x, y) coordinate
+
+		Returns:
+			list of tuples -- the path, not including start but including goal (empty if there is no path)
+		"""
+		if start == goal:
+			return []
+		key = (start, goal) if start < goal else (goal, start)
+		leg = self.legs.get(key)
+		if leg is None:
+			root, other = key[1], key[0] # the path is cached as running from key[0] to key[1]
+			if root not in self.trees.entries and other in self.trees.entries:
+				root, other = other, root
+			tree = self.tree(root)
+			cell = self.grid.to_id(other)
+			if self.grow(tree, cell) >= INF:
+				return []
+			leg = tree.descend(cell)
+			if root == key[0]: # walked from key[1] to key[0], turn it around
+				leg = leg[-2::-1] + [key[1]]
+			self.legs.put(key, leg)
+		if key[0] == start:
+			return list(leg)
+		return leg[-2::-1] + [key[0]]
+
+	def nearest(self, coord, goals):
+		"""Finds the goal closest to a cell by maze distance (ties go to the first in the list), growing the goals' trees in
+		step and only as far as needed, so the trees left over are reused by the next call.
+
+		Arguments:
+			coord {tuple} -- (x, y) coordinate
+			goals {list of tuples} -- candidate goals
+
+		Returns:
+			tuple -- the closest goal, None if none can be reached
+		"""
+		cell = self.grid.to_id(coord)
+		trees = [self.tree(goal) for goal in goals] # held here, so a small max_trees cannot drop them halfway
+		while True:
+			best, best_i = INF, None
+			for i, tree in enumerate(trees):
+				if tree.dist[cell] < best:
+					best, best_i = int(tree.dist[cell]), i
+			# a tree that has not reached the cell yet could still tie or beat best only if its radius is below best
+			behind = [tree for tree in trees if tree.dist[cell] == INF and not tree.done() and tree.radius < best]
+			if not behind:
+				return None if best_i is None else goals[best_i]
+			radius = min(tree.radius for tree in behind)
+			for tree in behind:
+				if tree.radius == radius:
+					before = tree.expanded
+					tree.grow()
+					self.expanded += tree.expanded - before
+
+	def stats(self):
+		return {'trees': self.trees.stats(), 'legs': self.legs.stats(), 'expanded': self.expanded}
+
+def pathfinder_multiple(states, start, goals, pathfinder = None):
+	"""
+	Multiple goals with the same "next dot = closest dot" strategy (and the same order) as astar_multiple, but every leg comes
+	from a Pathfinder, so the dots' reverse trees grow only as far as the legs need and carry over from one leg to the next,
+	and a pathfinder kept across calls carries its trees and legs over to the next tour as well
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goals {list of tuples} -- list of dots that need to be reached
+		pathfinder {Pathfinder} -- one to reuse, built here if not given
+
+	Returns:
+		deque of tuples, list of tuples, int -- the full path (including the start), the order the dots were eaten in, and the number of cells the trees expanded
+	"""
+	if pathfinder is None:
+		pathfinder = Pathfinder.from_states(states)
+	expanded = pathfinder.expanded
+	remaining = list(goals)
+	path, order = deque([start]), []
+	coord = start
+	while remaining:
+		dot = pathfinder.nearest(coord, remaining)
+		if dot is None:
+			print("Some dots are unreachable")
+			break
+		print("Found goal at {0}".format(dot))
+		path.extend(pathfinder.path(coord, dot))
+		remaining.remove(dot)
+		order.append(dot)
+		coord = dot
+	return path, order, pathfinder.expanded - expanded
@@ -0,0 +1,244 @@
+from utils import visited_to_path
+from grid import Grid
+from batch import SINGLE_SEARCHES
+from maze_search import SUBOPTIMALITY_BOUND
+from multiprocessing import connection, shared_memory
+import multiprocessing
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import numpy as np
+
+"""
+Portfolio search: several single-goal algorithms race on the same maze in separate processes, and the first one to come back
+with a path good enough for the requested optimality level wins, while the rest are stopped
+The maze is put in shared memory once (the Grid's passable bytes), and every worker rebuilds its states from there instead of
+being sent its own copy
+Every race is appended to a JSON-lines stats file, so over time it shows which algorithm wins on which mazes and how long each takes
+"""
+
+STATS_FILE = os.environ.get('MP1_PORTFOLIO_STATS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'portfolio_stats.jsonl'))
+DEFAULT_PORTFOLIO = ['greedy', 'bidirectional_bfs', 'bidirectional_astar', 'jps', 'weighted_astar']
+
+# worst-case path cost as a multiple of the optimal cost, None where there is no bound at all
+# (astar_single only re-pushes a cell when its f value drops below the popped node's, so it can miss the shortest path)
+GUARANTEES = {name: 1 for name in SINGLE_SEARCHES}
+GUARANTEES.update({'dfs': None, 'greedy': None, 'astar_single': None, 'weighted_astar': SUBOPTIMALITY_BOUND,
+	'dynamic_astar': SUBOPTIMALITY_BOUND, 'focal_astar': SUBOPTIMALITY_BOUND})
+
+def meets(name, optimality):
+	"""Tells whether an algorithm's paths are always good enough.
+
+	Arguments:
+		name {string} -- a name from batch.SINGLE_SEARCHES
+		optimality {float} -- the largest acceptable cost / optimal cost ratio (1 for optimal paths only), or None for any path
+
+	Returns:
+		bool -- true if every path the algorithm returns is within the ratio
+	"""
+	if optimality is None:
+		return True
+	guarantee = GUARANTEES[name]
+	return guarantee is not None and guarantee <= optimality
+
+class SharedGrid:
+	"""
+	A Grid's passable bytes copied into a shared memory block, which the workers attach to by name
+	The creating process owns the block and must call close() to free it
+	"""
+	def __init__(self, grid):
+		"""
+		Arguments:
+			grid {Grid} -- the compact maze
+		"""
+		self.height, self.width, self.stride = grid.height, grid.width, grid.stride
+		self.memory = shared_memory.SharedMemory(create = True, size = max(1, grid.size))
+		self.memory.buf[:grid.size] = grid.passable
+
+	def spec(self):
+		"""
+		Returns everything a worker needs to find and read the grid, as a small picklable tuple
+		"""
+		return (self.memory.name, self.height, self.width, self.stride)
+
+	def close(self):
+		self.memory.close()
+		self.memory.unlink()
+
+def attach_states(spec):
+	"""Rebuilds the set of open states from a shared grid, the way utils.parse_file returns them.
+
+	Arguments:
+		spec {tuple} -- from SharedGrid.spec()
+
+	Returns:
+		set of tuples -- represents the "empty" states in the maze
+	"""
+	name, height, width, stride = spec
+	memory = shared_memory.SharedMemory(name = name)
+	try:
+		cells = np.frombuffer(memory.buf, dtype=np.uint8, count = (height + 2) * stride)
+		ids = np.flatnonzero(cells)
+		del cells # the block cannot be closed while a view of it exists
+	finally:
+		memory.close()
+	xs, ys = np.divmod(ids, stride)
+	return set(zip((xs - 1).tolist(), (ys - 1).tolist()))
+
+def portfolio_worker(name, spec, start, goal, conn):
+	"""
+	Runs one algorithm and sends back its result. Runs inside a worker process
+	"""
+	states = attach_states(spec)
+	with contextlib.redirect_stdout(io.StringIO()): # the searches print as they go
+		start_time = time.perf_counter()
+		visited, num_expanded = SINGLE_SEARCHES[name](states, start, goal)
+		seconds = time.perf_counter() - start_time
+	found = goal in visited
+	path = [start] + visited_to_path(visited, goal)[::-1] if found else []
+	conn.send({'algorithm': name, 'found': found, 'cost': len(path) - 1 if found else None, 'path': path,
+		'nodes_expanded': num_expanded, 'search_seconds': round(seconds, 6)})
+	conn.close()
+
+def run_portfolio(grid, start, goal, algorithms = DEFAULT_PORTFOLIO, optimality = 1, timeout = None, stats_path = None, label = None):
+	"""Races the algorithms that meet the optimality level and returns the first path found.
+	Every algorithm gets its own process and its own pipe, so stopping the losers cannot leave a half-written result behind.
+	A worker that finds no path does not end the race (the others may be slower but still succeed).
+
+	Arguments:
+		grid {Grid} -- the compact maze
+		start {tuple} -- the starting point
+		goal {tuple} -- the goal point
+		algorithms {list of strings} -- names from batch.SINGLE_SEARCHES, the ones that do not meet the optimality level are left out
+		optimality {float} -- the largest acceptable cost / optimal cost ratio (1 for optimal paths only), or None for any path
+		timeout {float} -- seconds to wait before giving up on all of them, or None to wait as long as it takes
+		stats_path {string} -- JSON-lines file every algorithm's outcome is appended to, or None to keep no stats
+		label {string} -- what to call the maze in the stats
+
+	Returns:
+		dict, list of dicts -- the winning result (None if nothing found a path) and one row per algorithm with its status
+		("won", "finished", "no path", "failed" or "cancelled") and latency (wall seconds from the start of the race)
+	"""
+	for name in algorithms:
+		if name not in SINGLE_SEARCHES:
+			raise ValueError("Unknown algorithm {0}".format(name))
+	entrants = [name for name in algorithms if meets(name, optimality)]
+	if not entrants:
+		raise ValueError("None of {0} guarantees paths within {1} of optimal".format(", ".join(algorithms), optimality))
+
+	shared = SharedGrid(grid)
+	workers, rows = {}, {}
+	winner = None
+	race_start = time.perf_counter()
+	try:
+		for name in entrants:
+			receiver, sender = multiprocessing.Pipe(duplex = False)
+			process = multiprocessing.Process(target = portfolio_worker, args = (name, shared.spec(), start, goal, sender), daemon = True)
+			process.start()
+			sender.close() # only the worker writes to it, so EOF means the worker died
+			workers[receiver] = (name, process)
+
+		while workers and winner is None:
+			remaining = None if timeout is None else timeout - (time.perf_counter() - race_start)
+			if remaining is not None and remaining <= 0:
+				break
+			ready = connection.wait(list(workers), remaining)
+			latency = round(time.perf_counter() - race_start, 6)
+			for receiver in ready:
+				name, process = workers.pop(receiver)
+				try:
+					result = receiver.recv()
+				except EOFError:
+					rows[name] = {'algorithm': name, 'status': 'failed', 'latency': latency}
+					continue
+				finally:
+					receiver.close()
+				row = {key: value for key, value in result.items() if key != 'path'}
+				if not result['found']:
+					row.update(status = 'no path', latency = latency)
+				elif winner is None:
+					winner = dict(result, latency = latency)
+					row.update(status = 'won', latency = latency)
+				else:
+					row.update(status = 'finished', latency = latency) # came back in the same wait as the winner
+				rows[name] = row
+	finally:
+		latency = round(time.perf_counter() - race_start, 6)
+		for receiver, (name, process) in workers.items():
+			process.terminate()
+			rows[name] = {'algorithm': name, 'status': 'cancelled', 'latency': latency}
+		for receiver, (name, process) in workers.items():
+			process.join()
+			receiver.close()
+		shared.close()
+
+	rows = [rows[name] for name in entrants]
+	if stats_path is not None:
+		record_stats(stats_path, label, grid, optimality, rows)
+	return winner, rows
+
+def record_stats(stats_path, label, grid, optimality, rows):
+	"""
+	Appends one line per algorithm to the stats file
+	"""
+	with open(stats_path, mode='a') as f:
+		for row in rows:
+			f.write(json.dumps(dict(row, maze = label, height = grid.height, width = grid.width, optimality = optimality, time = round(time.time(), 3))) + '\n')
+
+def latency_summary(stats_path):
+	"""Sums up a stats file per algorithm.
+
+	Arguments:
+		stats_path {string} -- JSON-lines file written by run_portfolio
+
+	Returns:
+		dict -- the key is an algorithm, the value has its number of races, wins, and mean and max latency over the races it finished (None if it never finished)
+	"""
+	summary = {}
+	with open(stats_path) as f:
+		for line in f:
+			if not line.strip():
+				continue
+			row = json.loads(line)
+			entry = summary.setdefault(row['algorithm'], {'races': 0, 'wins': 0, 'finished': 0, 'cancelled': 0, 'total_latency': 0, 'max_latency': None})
+			entry['races'] += 1
+			if row['status'] == 'cancelled':
+				entry['cancelled'] += 1
+				continue
+			entry['wins'] += row['status'] == 'won'
+			entry['finished'] += 1
+			entry['total_latency'] += row['latency']
+			entry['max_latency'] = row['latency'] if entry['max_latency'] is None else max(entry['max_latency'], row['latency'])
+	for entry in summary.values():
+		entry['mean_latency'] = round(entry.pop('total_latency') / entry['finished'], 6) if entry['finished'] else None
+		entry['win_rate'] = round(entry['wins'] / entry['races'], 4)
+	return summary
+
+def print_usage():
+	print("To use:\npython portfolio.py <maze file> [optimality: 1 | 1.5 | any] [algorithm,algorithm,...]\npython portfolio.py stats [stats file]")
+	print("Algorithms: " + ", ".join(SINGLE_SEARCHES))
+
+if __name__ == "__main__":
+	if len(sys.argv) < 2:
+		print_usage()
+		sys.exit(1)
+	if sys.argv[1] == 'stats':
+		for name, entry in sorted(latency_summary(sys.argv[2] if len(sys.argv) > 2 else STATS_FILE).items()):
+			latencies = "mean latency {mean_latency}s, max {max_latency}s".format(**entry) if entry['finished'] else "never finished"
+			print("{0}: {1}/{2} wins, {3}, {4} cancelled".format(name, entry['wins'], entry['races'], latencies, entry['cancelled']))
+		sys.exit(0)
+
+	grid = Grid.from_file(sys.argv[1])
+	pacman, dots = grid.endpoints()
+	optimality = 1 if len(sys.argv) < 3 else None if sys.argv[2] == 'any' else float(sys.argv[2])
+	algorithms = sys.argv[3].split(',') if len(sys.argv) > 3 else DEFAULT_PORTFOLIO
+	winner, rows = run_portfolio(grid, pacman, dots[0], algorithms, optimality, stats_path = STATS_FILE, label = sys.argv[1])
+	for row in rows:
+		print("{algorithm}: {status} after {latency}s".format(**row))
+	if winner is None:
+		print("No path found")
+	else:
+		print("{0} won with a path of cost {1}".format(winner['algorithm'], winner['cost']))
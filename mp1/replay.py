@@ -0,0 +1,128 @@
+from utils import PACMAN, WALL, DOT
+import numpy as np
+import os
+import struct
+import zlib
+
+"""
+Replays a recorded search (an instrument.EventLog) as a sequence of frames, for the animation and for headless export
+A frame is only the cells that changed since the previous one, as {coord: (color, dot shown)}, and many events are folded
+into each frame, so drawing costs one update per frame instead of one per event, and a cell that changes several times
+within a frame is drawn once
+"""
+
+EMPTY, PACMAN_COLOR, TRAIL, FRONTIER, WALL_COLOR, DOT_COLOR = 'white', 'blue', 'cyan', 'yellow', 'gray', 'red' # same colors as maze_graphics
+RGB = {'white': (255, 255, 255), 'blue': (0, 0, 255), 'cyan': (0, 255, 255), 'yellow': (255, 255, 0), 'gray': (190, 190, 190), 'red': (255, 0, 0)}
+EVENTS_PER_FRAME = 20
+
+def frames(events, goals, events_per_frame = EVENTS_PER_FRAME):
+	"""Turns a search's event log into frames. Each expansion moves pacman and leaves a trail, each push marks the frontier,
+	and each dot eaten clears the cells the search forgot about (putting back the dots still to be eaten).
+
+	Arguments:
+		events {list of tuples} -- EventLog.events from the search
+		goals {list of tuples} -- the dots
+		events_per_frame {int} -- how many drawn events go into one frame
+
+	Yields:
+		dict -- {coord: (color, dot shown)} for every cell that changed since the previous frame
+	"""
+	goals = set(goals)
+	changes, count, prev_coord = {}, 0, None
+	for event in events:
+		kind = event[0]
+		if kind == 'expand':
+			coord = event[1]
+			changes[prev_coord or coord] = (TRAIL, False)
+			changes[coord] = (PACMAN_COLOR, False)
+			prev_coord = coord
+		elif kind == 'push':
+			coord, parent = event[1], event[2]
+			if coord == parent:
+				continue # the start, already on the board
+			changes[coord] = (FRONTIER, coord in goals)
+		elif kind == 'goal':
+			coord, discarded = event[1], event[2]
+			goals.discard(coord)
+			for k in discarded:
+				changes[k] = (EMPTY, k in goals)
+			changes[coord] = (PACMAN_COLOR, False)
+		else:
+			continue
+		count += 1
+		if count % events_per_frame == 0:
+			yield changes
+			changes = {}
+	if changes:
+		yield changes
+
+def maze_image(maze, cell_size):
+	"""
+	Draws the starting board as an RGB array, the same way maze_graphics.draw_maze does
+
+	Arguments:
+		maze {list} -- a list carrying the maze
+		cell_size {int} -- pixels per cell
+
+	Returns:
+		numpy array -- height x width x 3 array of uint8
+	"""
+	height, width = len(maze), max(len(row) for row in maze)
+	image = np.empty((height * cell_size, width * cell_size, 3), dtype=np.uint8)
+	image[:] = RGB[WALL_COLOR]
+	for x in range(height):
+		for y in range(len(maze[x])):
+			if maze[x][y] != WALL:
+				paint(image, (x, y), cell_size, PACMAN_COLOR if maze[x][y] == PACMAN else EMPTY, maze[x][y] == DOT)
+	return image
+
+def paint(image, coord, cell_size, color, dot):
+	"""
+	Fills one cell of an image, with the dot as a smaller square in the middle
+	"""
+	x, y = coord[0] * cell_size, coord[1] * cell_size
+	image[x:x + cell_size, y:y + cell_size] = RGB[color]
+	if dot:
+		inset = cell_size // 4
+		image[x + inset:x + cell_size - inset, y + inset:y + cell_size - inset] = RGB[DOT_COLOR]
+
+def write_png(output_path, image):
+	"""Writes an RGB array as a PNG file, using nothing but zlib.
+
+	Arguments:
+		output_path {string} -- file name
+		image {numpy array} -- height x width x 3 array of uint8
+	"""
+	height, width, _ = image.shape
+	raw = np.zeros((height, width * 3 + 1), dtype=np.uint8) # every row starts with filter type 0
+	raw[:, 1:] = image.reshape(height, width * 3)
+
+	def chunk(kind, data):
+		return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+	with open(output_path, mode='wb') as f:
+		f.write(b'\x89PNG\r\n\x1a\n')
+		f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+		f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+		f.write(chunk(b'IEND', b''))
+
+def export_frames(maze, frame_iter, output_dir, cell_size = 4):
+	"""Renders frames to frame_00000.png, frame_00001.png, ... without opening a window.
+
+	Arguments:
+		maze {list} -- a list carrying the maze
+		frame_iter {iterable} -- output of frames()
+		output_dir {string} -- where the images go (created if needed)
+		cell_size {int} -- pixels per cell
+
+	Returns:
+		int -- the number of images written
+	"""
+	os.makedirs(output_dir, exist_ok = True)
+	image = maze_image(maze, cell_size)
+	count = 0
+	for changes in frame_iter:
+		for coord, (color, dot) in changes.items():
+			paint(image, coord, cell_size, color, dot)
+		write_png(os.path.join(output_dir, 'frame_{0:05d}.png'.format(count)), image)
+		count += 1
+	return count
@@ -0,0 +1,370 @@
+from utils import visited_to_path, LRUCache
+from grid import Grid
+from distance_cache import load_distances
+from batch import SINGLE_SEARCHES, MULTIPLE_SEARCHES
+from pathfinder import Pathfinder, pathfinder_multiple
+from corridor import CorridorGraph, corridor_bfs, corridor_astar
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+"""
+Long-running maze query service
+Clients send one JSON object per line and get one JSON object back per line, over TCP or a Unix socket. A query looks like
+	{"maze": "mp1.1/inputs/bigMaze.txt", "start": [1, 1], "goal": [5, 7], "algorithm": "astar_single"}
+("goals" instead of "goal" for the multi-dot searches, start and goal(s) default to the maze's pacman and dots) and is answered with
+	{"ok": true, "found": true, "cost": ..., "path": [[x, y], ...], "nodes_expanded": ..., "cached": false, "seconds": ...}
+{"op": "stats"} returns the cache hit rates and request latencies
+Mazes are parsed once and kept in memory along with their Grid and distance tables, and answers are kept in an LRU cache keyed by the query
+Every maze also gets a pathfinder.Pathfinder, which the "distance_field" and "pathfinder_multiple" algorithms share, so their reverse
+trees and legs carry over from one request to the next
+The searches are CPU-bound, so the server runs the ones the answer cache cannot serve in a pool of worker processes, and the event
+loop keeps answering other connections meanwhile. Every worker keeps its own mazes, distance tables, pathfinders and corridor graphs,
+and the server process itself only keeps each maze's pacman and dots (to fill in the defaults) along with the answer cache
+"""
+
+CACHE_SIZE = 4096 # answers kept in the LRU cache
+TREE_CACHE_SIZE = 256 # reverse trees each maze's Pathfinder keeps
+TABLE_CACHE_SIZE = 64 # distance tables kept in memory, each one holds a distance per cell for every goal
+
+_worker_service = None # the MazeService of a pool process, set up by init_worker
+
+class MazeService:
+	"""
+	Everything the server keeps resident: parsed mazes, their grids and distance tables, and the answer cache
+	Kept separate from the socket handling, so it can also be used directly
+	"""
+	def __init__(self, root = '.', cache_size = CACHE_SIZE, tree_cache_size = TREE_CACHE_SIZE, table_cache_size = TABLE_CACHE_SIZE):
+		"""
+		Arguments:
+			root {string} -- directory maze ids are relative to (ids cannot point outside it)
+			cache_size {int} -- answers kept in the LRU cache
+			tree_cache_size {int} -- reverse trees kept resident per maze
+			table_cache_size {int} -- distance tables kept in memory (clients choose the goals, so there is no natural limit)
+		"""
+		self.root = os.path.abspath(root)
+		self.mazes = {} # the key is a maze id, the value is (states, pacman, dots, grid)
+		self.tables = LRUCache(table_cache_size) # the key is (maze id, goals), the value is a DotDistances
+		self.answers = LRUCache(cache_size)
+		self.pathfinders = {} # the key is a maze id, the value is its Pathfinder
+		self.corridor_graphs = {} # the key is a maze id, the value is its CorridorGraph
+		self.known_endpoints = {} # the key is a maze id, the value is (pacman, dots), all query_async needs to know about a maze
+		self.tree_cache_size = tree_cache_size
+		self.executor = None # the worker pool query_async runs searches in, see start_pool
+		self.workers = None
+		self.requests = 0
+		self.errors = 0
+		self.total_seconds = 0
+		self.max_seconds = 0
+
+	def load(self, maze_id):
+		"""Parses a maze the first time it is asked for.
+
+		Arguments:
+			maze_id {string} -- path of the maze file, relative to root
+
+		Returns:
+			tuple -- (states, pacman, dots, grid)
+		"""
+		loaded = self.mazes.get(maze_id)
+		if loaded is None:
+			path = os.path.abspath(os.path.join(self.root, maze_id))
+			if os.path.commonpath([self.root, path]) != self.root:
+				raise ValueError("Maze {0} is outside the maze directory".format(maze_id))
+			grid = Grid.from_file(path) # the grid is all the server needs, the maze is never built as lists
+			pacman, dots = grid.endpoints()
+			loaded = (grid.to_states(), pacman, dots, grid)
+			self.mazes[maze_id] = loaded
+		return loaded
+
+	def distances(self, maze_id, goals):
+		"""
+		Returns the DotDistances for a maze and a set of goals, computing it (or loading it from the disk cache) only once
+		"""
+		key = (maze_id, goals)
+		table = self.tables.get(key)
+		if table is None:
+			table = load_distances(self.load(maze_id)[3], list(goals))
+			self.tables.put(key, table)
+		return table
+
+	def pathfinder(self, maze_id):
+		"""
+		Returns the maze's Pathfinder, which keeps its reverse trees and legs for as long as the server runs
+		"""
+		pathfinder = self.pathfinders.get(maze_id)
+		if pathfinder is None:
+			pathfinder = Pathfinder(self.load(maze_id)[3], max_trees = self.tree_cache_size)
+			self.pathfinders[maze_id] = pathfinder
+		return pathfinder
+
+	def corridor_graph(self, maze_id):
+		"""
+		Returns the maze's CorridorGraph, contracted once and shared by every corridor_bfs and corridor_astar query
+		Dead ends are not pruned, so any open cell can become a start or a goal later on
+		"""
+		graph = self.corridor_graphs.get(maze_id)
+		if graph is None:
+			graph = CorridorGraph(self.load(maze_id)[0], prune = False)
+			self.corridor_graphs[maze_id] = graph
+		return graph
+
+	def solve(self, maze_id, start, goals, algorithm):
+		"""Runs one search, without the cache.
+
+		Returns:
+			dict -- found (whether every goal was reached), cost, path (including the start) and nodes_expanded
+		"""
+		states, pacman, dots, grid = self.load(maze_id)
+		for coord in (start,) + goals:
+			if coord not in states:
+				raise ValueError("{0} is not an open cell of {1}".format(list(coord), maze_id))
+		with contextlib.redirect_stdout(io.StringIO()): # the searches print as they go
+			if algorithm == 'distance_field':
+				if len(goals) != 1:
+					raise ValueError("distance_field takes exactly one goal")
+				pathfinder = self.pathfinder(maze_id)
+				expanded = pathfinder.expanded
+				path = [start] + pathfinder.path(start, goals[0])
+				num_expanded = pathfinder.expanded - expanded # 0 once the goal's tree already reaches start
+			elif algorithm == 'pathfinder_multiple':
+				path, order, num_expanded = pathfinder_multiple(states, start, list(goals), self.pathfinder(maze_id))
+				path = list(path)
+			elif algorithm in SINGLE_SEARCHES:
+				if len(goals) != 1:
+					raise ValueError("{0} takes exactly one goal".format(algorithm))
+				search = SINGLE_SEARCHES[algorithm]
+				if search in (corridor_bfs, corridor_astar):
+					visited, num_expanded = search(states, start, goals[0], self.corridor_graph(maze_id))
+				else:
+					visited, num_expanded = search(states, start, goals[0])
+				path = [start] + visited_to_path(visited, goals[0])[::-1]
+			elif algorithm in MULTIPLE_SEARCHES:
+				path, order, num_expanded = MULTIPLE_SEARCHES[algorithm](states, start, list(goals), self.distances(maze_id, goals))
+				path = list(path)
+			else:
+				raise ValueError("Unknown algorithm {0}".format(algorithm))
+		return {'found': set(goals) <= set(path), 'cost': len(path) - 1, 'path': [list(coord) for coord in path], 'nodes_expanded': num_expanded}
+
+	def endpoints(self, maze_id):
+		"""
+		Returns the maze's pacman and its dots as a tuple
+		"""
+		states, pacman, dots, grid = self.load(maze_id)
+		return pacman, tuple(dots)
+
+	def resolve(self, request, endpoints):
+		"""Fills in a query's defaults.
+
+		Arguments:
+			request {dict} -- a query
+			endpoints {tuple} -- the maze's (pacman, dots), from endpoints
+
+		Returns:
+			tuple -- (maze id, start, goals, algorithm), the arguments of solve and the key of the answer cache
+		"""
+		maze_id = request['maze']
+		pacman, dots = endpoints
+		start = tuple(request['start']) if 'start' in request else pacman
+		if 'goal' in request:
+			goals = (tuple(request['goal']),)
+		else:
+			goals = tuple(tuple(goal) for goal in request['goals']) if 'goals' in request else tuple(dots)
+		algorithm = request.get('algorithm', 'astar_single' if len(goals) == 1 else 'astar_multiple')
+		return (maze_id, start, goals, algorithm)
+
+	def query(self, request):
+		"""Answers one request (already decoded from JSON), from the cache when possible.
+
+		Arguments:
+			request {dict} -- a query or {"op": "stats"}
+
+		Returns:
+			dict -- the answer, with "ok" false and an "error" message if the request could not be answered
+		"""
+		start_time = time.perf_counter()
+		self.requests += 1
+		try:
+			if request.get('op') == 'stats':
+				return self.stats()
+			key = self.resolve(request, self.endpoints(request['maze']))
+			answer = self.answers.get(key)
+			cached = answer is not None
+			if not cached:
+				answer = self.solve(*key)
+				self.answers.put(key, answer)
+			response = dict(answer, ok = True, cached = cached)
+		except (KeyError, TypeError, AttributeError, ValueError, OSError) as e:
+			response = self.error(e)
+		return self.timed(response, start_time)
+
+	def start_pool(self, workers = None):
+		"""Starts the worker processes query_async runs searches in.
+
+		Arguments:
+			workers {int} -- number of processes, defaults to one per core
+		"""
+		self.workers = workers
+		self.executor = ProcessPoolExecutor(max_workers = workers, initializer = init_worker,
+			initargs = (self.root, self.tree_cache_size, self.tables.capacity))
+
+	def close_pool(self):
+		if self.executor is not None:
+			self.executor.shutdown(wait = False, cancel_futures = True)
+			self.executor = None
+
+	async def in_pool(self, function, *args):
+		"""Runs a function in the worker pool. A pool that broke (a worker died) is replaced, so only the requests it was running fail.
+
+		Arguments:
+			function {function} -- a module-level function, so it can be sent to the workers
+			args -- its arguments
+
+		Returns:
+			whatever the function returns
+		"""
+		executor = self.executor
+		try:
+			return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+		except BrokenProcessPool:
+			if self.executor is executor: # the first request to notice starts a new pool, the others just fail
+				executor.shutdown(wait = False, cancel_futures = True)
+				self.start_pool(self.workers)
+			raise
+
+	async def query_async(self, request):
+		"""Same as query, but the maze is loaded and searched in the worker pool (see start_pool), so the event loop is free until the
+		answer is ready. The only thing this process learns about a maze is its pacman and dots.
+
+		Arguments:
+			request {dict} -- a query or {"op": "stats"}
+
+		Returns:
+			dict -- the answer, with "ok" false and an "error" message if the request could not be answered
+		"""
+		start_time = time.perf_counter()
+		self.requests += 1
+		try:
+			if request.get('op') == 'stats':
+				return self.stats()
+			maze_id = request['maze']
+			endpoints = self.known_endpoints.get(maze_id)
+			if endpoints is None:
+				endpoints = await self.in_pool(endpoints_in_worker, maze_id)
+				self.known_endpoints[maze_id] = endpoints
+			key = self.resolve(request, endpoints)
+			answer = self.answers.get(key)
+			cached = answer is not None
+			if not cached:
+				answer = await self.in_pool(solve_in_worker, *key)
+				self.answers.put(key, answer)
+			response = dict(answer, ok = True, cached = cached)
+		except (KeyError, TypeError, AttributeError, ValueError, OSError, BrokenProcessPool) as e:
+			response = self.error(e)
+		return self.timed(response, start_time)
+
+	def error(self, e):
+		"""
+		Counts a failed request and returns its response
+		"""
+		self.errors += 1
+		return {'ok': False, 'error': "{0}: {1}".format(type(e).__name__, e)}
+
+	def timed(self, response, start_time):
+		"""
+		Adds a request's latency to the totals and to its response
+		"""
+		seconds = time.perf_counter() - start_time
+		self.total_seconds += seconds
+		self.max_seconds = max(self.max_seconds, seconds)
+		response['seconds'] = round(seconds, 6)
+		return response
+
+	def stats(self):
+		"""
+		Returns the request counts, latencies and cache hit rates (only this service's own caches, not those of the pool workers)
+		"""
+		return {'ok': True, 'requests': self.requests, 'errors': self.errors, 'mazes': len(self.mazes), 'distance_tables': self.tables.stats(), 'corridor_graphs': len(self.corridor_graphs),
+			'answers': self.answers.stats(), 'pathfinders': {maze_id: pathfinder.stats() for maze_id, pathfinder in self.pathfinders.items()},
+			'mean_seconds': round(self.total_seconds / self.requests, 6) if self.requests else None, 'max_seconds': round(self.max_seconds, 6)}
+
+def init_worker(root, tree_cache_size, table_cache_size):
+	"""
+	Gives a pool process its own MazeService, which keeps the mazes and their caches resident for the life of the process
+	"""
+	global _worker_service
+	_worker_service = MazeService(root, tree_cache_size = tree_cache_size, table_cache_size = table_cache_size)
+
+def endpoints_in_worker(maze_id):
+	"""
+	MazeService.endpoints on the process's own service. Runs inside a worker process
+	"""
+	return _worker_service.endpoints(maze_id)
+
+def solve_in_worker(maze_id, start, goals, algorithm):
+	"""
+	MazeService.solve on the process's own service. Runs inside a worker process
+	"""
+	return _worker_service.solve(maze_id, start, goals, algorithm)
+
+async def handle_client(service, reader, writer):
+	"""
+	Answers JSON lines from one connection until it closes
+	"""
+	try:
+		while True:
+			line = await reader.readline()
+			if not line:
+				break
+			if not line.strip():
+				continue
+			try:
+				response = await service.query_async(json.loads(line))
+			except ValueError as e: # not JSON
+				response = {'ok': False, 'error': "ValueError: {0}".format(e)}
+			writer.write((json.dumps(response) + '\n').encode())
+			await writer.drain()
+	except ConnectionError:
+		pass
+	finally:
+		writer.close()
+
+async def serve(address, service, workers = None):
+	"""Runs the server until it is cancelled.
+
+	Arguments:
+		address {string} -- a port number (TCP on localhost) or a Unix socket path
+		service {MazeService} -- what answers the queries and keeps the answer cache
+		workers {int} -- processes the searches run in, defaults to one per core
+	"""
+	service.start_pool(workers)
+	handler = lambda reader, writer: handle_client(service, reader, writer)
+	try:
+		if address.isdigit():
+			server = await asyncio.start_server(handler, '127.0.0.1', int(address))
+		else:
+			server = await asyncio.start_unix_server(handler, address)
+		print("Serving mazes on {0}".format(address))
+		async with server:
+			await server.serve_forever()
+	finally:
+		service.close_pool()
+
+def print_usage():
+	print("To use:\npython server.py <port | unix socket path> [cache size] [worker processes]")
+
+if __name__ == "__main__":
+	if len(sys.argv) < 2:
+		print_usage()
+		sys.exit(1)
+	service = MazeService(cache_size = int(sys.argv[2]) if len(sys.argv) > 2 else CACHE_SIZE)
+	try:
+		asyncio.run(serve(sys.argv[1], service, int(sys.argv[3]) if len(sys.argv) > 3 else None))
+	except KeyboardInterrupt:
+		pass
@@ -0,0 +1,172 @@
+from dot_distances import DotDistances
+from collections import deque
+import numpy as np
+
+"""
+Dot order optimization for big multi-dot mazes, treating the problem as an open traveling salesman path
+(start at pacman, visit every dot, no need to come back) over true maze distances
+A nearest-neighbour tour is improved with 2-opt and Or-opt moves until neither finds anything better, which gets
+close to optimal tours far faster than searching the (position, eaten dots) state space
+"""
+
+def tour_matrix(distances, start):
+	"""Builds the weight matrix the local search works on.
+	Rows/columns 0..k-1 are the dots, k is the start and k + 1 is a dummy end node that is 0 away from everything,
+	which turns the open path into a closed sequence so every move can be scored the same way.
+
+	Arguments:
+		distances {DotDistances} -- precomputed distance table for the dots
+		start {tuple} -- the starting point
+
+	Returns:
+		numpy array -- (k + 2) x (k + 2) int64 matrix
+	"""
+	k = len(distances.dots)
+	weights = np.zeros((k + 2, k + 2), dtype=np.int64)
+	weights[:k, :k] = distances.dot_to_dot
+	from_start = distances.cell_to_dot[:, distances.grid.to_id(start)]
+	weights[k, :k] = from_start
+	weights[:k, k] = from_start
+	return weights
+
+def tour_cost(weights, seq):
+	"""
+	Length of a sequence of matrix indices
+	"""
+	seq = np.asarray(seq)
+	return int(weights[seq[:-1], seq[1:]].sum())
+
+def nearest_neighbour(weights, k):
+	"""Starts at the start node and keeps going to the closest unvisited dot.
+
+	Returns:
+		list of ints -- the full sequence: start, the k dots, dummy end
+	"""
+	seq, visited = [k], np.zeros(k, dtype=bool)
+	for _ in range(k):
+		row = np.where(visited, np.iinfo(np.int64).max, weights[seq[-1], :k])
+		nxt = int(np.argmin(row))
+		visited[nxt] = True
+		seq.append(nxt)
+	return seq + [k + 1]
+
+def two_opt(weights, seq):
+	"""Repeatedly reverses the segment seq[p..q] that shortens the tour the most, scoring every (p, q) at once.
+
+	Arguments:
+		weights {numpy array} -- from tour_matrix
+		seq {list of ints} -- start, dots, dummy end
+
+	Returns:
+		list of ints, int -- the improved sequence and the number of moves made
+	"""
+	seq = np.array(seq)
+	n = len(seq)
+	moves = 0
+	while n > 3:
+		prev, first = seq[:-2], seq[1:-1] # edge into position p (p = 1 .. n - 2)
+		last, nxt = seq[1:-1], seq[2:] # edge out of position q
+		delta = (weights[prev[:, None], last[None, :]] + weights[first[:, None], nxt[None, :]]
+			- weights[prev, first][:, None] - weights[last, nxt][None, :])
+		delta[np.tril_indices(n - 2)] = 0 # only q > p
+		p, q = np.unravel_index(np.argmin(delta), delta.shape)
+		if delta[p, q] >= 0:
+			break
+		seq[p + 1:q + 2] = seq[p + 1:q + 2][::-1]
+		moves += 1
+	return seq.tolist(), moves
+
+def or_opt(weights, seq, max_length = 3):
+	"""Moves a run of 1 to max_length dots (possibly reversed) to the best other place in the tour, first improvement wins.
+
+	Arguments:
+		weights {numpy array} -- from tour_matrix
+		seq {list of ints} -- start, dots, dummy end
+		max_length {int} -- longest run to try moving
+
+	Returns:
+		list of ints, int -- the improved sequence and the number of moves made
+	"""
+	seq = list(seq)
+	moves = 0
+	improved = True
+	while improved:
+		improved = False
+		for length in range(1, max_length + 1):
+			for i in range(1, len(seq) - length):
+				a, s, e, b = seq[i - 1], seq[i], seq[i + length - 1], seq[i + length]
+				removed = weights[a, s] + weights[e, b] - weights[a, b]
+				rest = np.array(seq[:i] + seq[i + length:])
+				u, v = rest[:-1], rest[1:] # every edge the run could be inserted into
+				forward = weights[u, s] + weights[e, v] - weights[u, v]
+				backward = weights[u, e] + weights[s, v] - weights[u, v]
+				j = int(np.argmin(np.minimum(forward, backward)))
+				gain = removed - min(forward[j], backward[j])
+				if gain <= 0:
+					continue
+				run = seq[i:i + length] if forward[j] <= backward[j] else seq[i:i + length][::-1]
+				rest = rest.tolist()
+				seq = rest[:j + 1] + run + rest[j + 1:]
+				moves += 1
+				improved = True
+				break
+			if improved:
+				break
+	return seq, moves
+
+def optimize_order(distances, start):
+	"""Nearest-neighbour tour, then 2-opt and Or-opt in turn until neither can improve it.
+
+	Arguments:
+		distances {DotDistances} -- precomputed distance table for the dots
+		start {tuple} -- the starting point
+
+	Returns:
+		list of tuples, int, int -- the dot order, its cost, and the number of improving moves made
+	"""
+	k = len(distances.dots)
+	weights = tour_matrix(distances, start)
+	seq = nearest_neighbour(weights, k)
+	total_moves = 0
+	while True:
+		seq, moves_2 = two_opt(weights, seq)
+		seq, moves_or = or_opt(weights, seq)
+		total_moves += moves_2 + moves_or
+		if moves_or == 0:
+			break
+	order = [distances.dots[i] for i in seq[1:-1]]
+	return order, tour_cost(weights, seq[:-1]), total_moves
+
+def tsp_tour(states, start, goals, distances = None, legs = None):
+	"""
+	Multi-dot solver built on optimize_order, with the same return format as astar_multiple
+	Legs between consecutive dots come from the distance table and are cached by (from, to), so tours that share legs share the work
+	No search nodes are expanded (all the work is the table precomputation), so the expansion count is always 0
+
+	Arguments:
+		states {set of tuples} -- represents the "empty" states in the maze
+		start {tuple} -- the starting point
+		goals {list of tuples} -- list of dots that need to be reached
+		distances {DotDistances} -- precomputed distance table for these goals, built here if not given
+		legs {dict} -- leg cache to reuse across calls, the key is (from, to) and the value is the path
+
+	Returns:
+		deque of tuples, list of tuples, int -- the full path (including the start), the dot order, and 0
+	"""
+	if distances is None:
+		distances = DotDistances.from_states(states, goals)
+	if legs is None:
+		legs = {}
+	order, cost, moves = optimize_order(distances, start)
+
+	path = deque([start])
+	coord = start
+	for dot in order:
+		leg = legs.get((coord, dot))
+		if leg is None:
+			leg = distances.path_to(coord, dot)
+			legs[(coord, dot)] = leg
+		path.extend(leg)
+		coord = dot
+	print("Tour of cost {0} after {1} improving moves".format(cost, moves))
+	return path, order, 0
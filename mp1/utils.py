@@ -1,6 +1,6 @@
-import copy
+import heapq
 import math
-from collections import deque
+from collections import deque, OrderedDict
 
 PACMAN, WALL, DOT = 'P', '%', '.'
 
@@ -10,6 +10,19 @@ def parse_file(file):
 	Arguments:
 		file {string} -- file name
 	
+	Returns:
+		list, set, tuple, list of tuple -- Returns the maze in list format, a set of possible states, the starting location (pacman), and a list of dot locations.
+	"""
+	with open(file) as f:
+		lines = f.readlines()
+	return parse_lines(lines)
+
+def parse_lines(lines):
+	"""Same as parse_file, for a maze that is already in memory (for example one from maze_gen)
+	
+	Arguments:
+		lines {list of strings} -- the rows of the maze
+	
 	Returns:
 		list, set, tuple, list of tuple -- Returns the maze in list format, a set of possible states, the starting location (pacman), and a list of dot locations.
 	"""
@@ -18,8 +31,6 @@ def parse_file(file):
 	pacman = (0,0)
 	dots = []
 
-	with open(file) as f:
-		lines = f.readlines()
 	lines = [line.strip() for line in lines]
 	for x in range(len(lines)):
 		line = lines[x]
@@ -47,8 +58,31 @@ def manhattan(p1, p2):
 	"""
 	return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
 
+def write_solution(output_path, maze, marks, footer):
+	"""Writes a maze with some cells overwritten, one whole row per write.
+	Only a single row buffer is ever copied, instead of deep-copying the whole maze.
+
+	Arguments:
+		output_path {string} -- file name
+		maze {list} -- a list carrying the maze (not modified)
+		marks {iterable} -- (coordinate, character) pairs to overlay, later pairs win
+		footer {list of strings} -- lines written after the maze, the last one without a newline
+	"""
+	by_row = {}
+	for coord, c in marks:
+		by_row.setdefault(coord[0], []).append((coord[1], c))
+
+	row = []
+	with open(output_path, mode='w') as f:
+		for x in range(len(maze)):
+			row[:] = maze[x]
+			for y, c in by_row.get(x, ()):
+				row[y] = c
+			f.write(''.join(row) + '\n')
+		f.write('\n'.join(footer))
+
 def print_sol(output_path, maze, sol, num_nodes_expanded):
-	"""Write documentation for this
+	"""Writes the maze with the solution path drawn in dots, followed by the path cost and the number of nodes expanded.
 
 	Arguments:
 		output_path {string} -- file name
@@ -56,67 +90,70 @@ def print_sol(output_path, maze, sol, num_nodes_expanded):
 		sol {list} -- a list of tuples carrying the solution 
 		num_nodes_expanded {int} -- the number of nodes expanded (lol)
 	"""
-	maze = copy.deepcopy(maze)
-	for c in sol:
-		maze[c[0]][c[1]] = '.'
+	write_solution(output_path, maze, ((c, '.') for c in sol),
+		['Path cost: ' + str(len(sol)), 'Nodes expanded: ' + str(num_nodes_expanded)])
 
-	with open(output_path, mode='w') as f:
-		for x in range(len(maze)):
-			for y in range(len(maze[0])):
-				f.write(maze[x][y])
-			f.write('\n')
-		f.write('Path cost: ' + str(len(sol)) + '\n')
-		f.write('Nodes expanded: ' + str(num_nodes_expanded))
+def dot_label(i):
+	"""
+	Returns the character used to mark the i-th dot eaten: 0-9, then a-z, then A-Z
+	We are assuming there will not be more than 62 dots (past that the labels run on through the ASCII table)
+	"""
+	if i < 10:
+		return str(i)
+	if i < 36:
+		return chr(97 + i - 10)
+	return chr(65 + i - 36)
 
 def print_sol_multiple(output_path, maze, sol, order, num_nodes_expanded):
-	maze = copy.deepcopy(maze)
-	num = 0
-	for dot in order:
-		if num < 10:
-			maze[dot[0]][dot[1]] = num
-			num += 1
-			if num == 10:
-				num = 97
-		else:
-			maze[dot[0]][dot[1]] = chr(num)
-			num += 1
-			if num == 123:
-				num = 65 # We are assuming there will not be more than 62 dots
+	write_solution(output_path, maze, ((dot, dot_label(i)) for i, dot in enumerate(order)),
+		['Solution cost: ' + str(len(sol) - 1), 'Nodes expanded: ' + str(num_nodes_expanded)]) # len(sol) - 1 because sol includes the start node
 
-	with open(output_path, mode='w') as f:
-		for x in range(len(maze)):
-			for y in range(len(maze[0])):
-				f.write(str(maze[x][y]))
-			f.write('\n')
-		f.write('Solution cost: ' + str(len(sol) - 1) + '\n') # len(sol) - 1 because sol includes the start node
-		f.write('Nodes expanded: ' + str(num_nodes_expanded))
+def trace_path(parents, goal):
+	"""Walks parent pointers back from the goal until it reaches the start, which is the one state that is its own parent.
+	Works on a visited dict (any hashable states) or on a flat parent array (cell ids, -1 meaning unvisited).
 
-def visited_to_path(visited, goal):
+	Arguments:
+		parents {dict or array} -- parents[state] is the state it was reached from
+		goal {hashable} -- state the path ends at
+
+	Returns:
+		list -- the path, goal first and not including the start (empty if the goal was never reached)
+	"""
 	path = []
-	curr, prev = goal, visited.get(goal)
-	while curr != prev and curr != None:
+	curr = goal
+	prev = parents.get(curr) if isinstance(parents, dict) else parents[curr]
+	if prev is None or prev == -1:
+		return path # the search never reached the goal
+	while curr != prev:
 		path.append(curr)
 		curr = prev
-		prev = visited.get(prev)
+		prev = parents[curr]
 	return path
 
+def visited_to_path(visited, goal):
+	return trace_path(visited, goal)
+
+def path_to_visited(path):
+	"""
+	Builds a visited dict holding just one path (start first), which visited_to_path turns back into that path
+	For searches that only ever have the path itself in memory
+	"""
+	visited = {path[0]: path[0]}
+	for prev, curr in zip(path, path[1:]):
+		visited[curr] = prev
+	return visited
+
 def visited_to_path2(visited, goal):
-	path = []
-	curr, prev = goal, visited.get(goal)
-	while curr != ((4,4),()):
-		path.append(curr[0])
-		curr = prev
-		prev = visited.get(prev)
-	return path
+	"""
+	For bfs2, whose states are (coordinate, dots eaten) pairs, returns just the coordinates
+	"""
+	return [state[0] for state in trace_path(visited, goal)]
 
 def visited_to_path_deque(visited, goal):
-	path = deque()
-	curr, prev = goal, visited[goal]
-	while curr != prev:
-		path.appendleft(curr)
-		curr = prev
-		prev = visited[prev]
-	return path
+	"""
+	Same path as visited_to_path, but in start-to-goal order
+	"""
+	return deque(reversed(trace_path(visited, goal)))
 
 def get_closest_dot(dots, curr) :
 	"""Returns the dot closest to the current coordinates
@@ -135,4 +172,124 @@ def get_closest_dot(dots, curr) :
 		if heur < dist: 
 			dist = heur
 			next_dot = dot
-	return next_dot
\ No newline at end of file
+	return next_dot
+
+class PriorityFrontier:
+	"""
+	A binary heap frontier shared by the informed searches (greedy, A*)
+	Replaces the old "min(nodes) then nodes.remove(min_node)" pattern, which was O(n) per expansion
+	Decrease-key is done by re-pushing the item, stale heap entries are skipped lazily when popped
+	Ties are broken by insertion order, which is the same order the old list-based frontier used
+	"""
+	def __init__(self):
+		"""
+		Initialize an empty frontier
+		"""
+		self.heap = []
+		self.best = {} # the key is an item, the value is the lowest priority it has been pushed with
+		self.closed = set()
+		self.counter = 0
+
+	def __len__(self):
+		"""
+		Returns the number of items that are still open (stale heap entries are not counted)
+		"""
+		return len(self.best) - len(self.closed)
+
+	def __iter__(self):
+		"""
+		Iterates over the open items, in no particular order
+		"""
+		for item in self.best:
+			if item not in self.closed:
+				yield item
+
+	def push(self, item, priority):
+		"""Adds an item to the frontier, or lowers its priority if it is already open.
+
+		Arguments:
+			item {hashable} -- the search state (usually a coordinate)
+			priority {number} -- the key the heap is ordered on, lower is popped first
+
+		Returns:
+			bool -- True if the item was pushed, False if it is closed or already open with a priority at least as good
+		"""
+		if item in self.closed:
+			return False
+		best = self.best.get(item)
+		if best is not None and best <= priority:
+			return False
+		self.best[item] = priority
+		heapq.heappush(self.heap, (priority, self.counter, item))
+		self.counter += 1
+		return True
+
+	def peek(self):
+		"""Returns the lowest priority in the frontier without removing anything.
+
+		Returns:
+			number -- the priority the next pop would return, or None if the frontier is empty
+		"""
+		heap = self.heap
+		while heap:
+			priority, _, item = heap[0]
+			if item in self.closed or self.best[item] != priority:
+				heapq.heappop(heap) # drop the stale entry now so the next peek is O(1)
+				continue
+			return priority
+		return None
+
+	def reopen(self, item):
+		"""
+		Lets a closed item be pushed again, for searches (like weighted A*) that can find a cheaper path to an expanded state
+		"""
+		if item in self.closed:
+			self.closed.discard(item)
+			del self.best[item]
+
+	def pop(self):
+		"""Removes the open item with the lowest priority and closes it.
+
+		Returns:
+			hashable, number -- the item and the priority it was popped with, or (None, None) if the frontier is empty
+		"""
+		while self.heap:
+			priority, _, item = heapq.heappop(self.heap)
+			if item in self.closed or self.best[item] != priority:
+				continue # stale entry left behind by a re-push
+			self.closed.add(item)
+			return item, priority
+		return None, None
+
+class LRUCache:
+	"""
+	Fixed-size cache that drops the least recently used entry when full, and counts its hits and misses
+	"""
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key):
+		"""
+		Returns the cached value (marking it as recently used), or None
+		"""
+		value = self.entries.get(key)
+		if value is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.entries.move_to_end(key)
+		return value
+
+	def put(self, key, value):
+		self.entries[key] = value
+		self.entries.move_to_end(key)
+		if len(self.entries) > self.capacity:
+			self.entries.popitem(last = False)
+
+	def stats(self):
+		lookups = self.hits + self.misses
+		return {'size': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+			'hit_rate': round(self.hits / lookups, 4) if lookups else None}